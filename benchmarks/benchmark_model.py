@@ -1,5 +1,10 @@
 import os
 
+import numpy as np
+import pandas as pd
+from anndata import AnnData
+from spatialdata.models import TableModel
+
 from napari_spatialdata._model import DataModel
 
 
@@ -14,3 +19,34 @@ class DataModelSuite:
 
     def time_model_get_items(self, _n: int) -> None:
         self.model.get_items("columns_df")
+
+
+class DataModelTableSuite:
+    params = [1] if "PR" in os.environ else [1, 10]
+
+    def setup(self, n: int) -> None:
+        n_obs = 10_000 * n
+        rng = np.random.default_rng(0)
+        obs = pd.DataFrame(
+            {
+                "region": pd.Categorical(["blobs"] * n_obs),
+                "instance_id": np.arange(1, n_obs + 1),
+                "categorical": pd.Categorical(rng.choice(["a", "b", "c"], size=n_obs)),
+                "continuous": rng.random(n_obs),
+            }
+        )
+        adata = AnnData(rng.random((n_obs, 50)), obs=obs)
+        self.model = DataModel()
+        self.model.adata = TableModel.parse(adata, region="blobs", region_key="region", instance_key="instance_id")
+
+    def time_model_get_obs_categorical(self, _n: int) -> None:
+        self.model.get_obs("categorical")
+
+    def time_model_get_obs_continuous(self, _n: int) -> None:
+        self.model.get_obs("continuous")
+
+    def time_model_get_var(self, _n: int) -> None:
+        self.model.get_var("10")
+
+    def time_model_get_items_var(self, _n: int) -> None:
+        self.model.get_items("var")
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
+from contextlib import ExitStack, contextmanager
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -9,6 +10,7 @@ import pandas as pd
 from anndata import AnnData
 from napari.layers import Layer
 from napari.utils.events import EmitterGroup, Event
+from scipy.sparse import issparse
 from spatialdata._types import ArrayLike
 from spatialdata.models import get_table_keys
 
@@ -28,6 +30,10 @@ class DataModel:
     _layer: Layer = field(init=False, default=None, repr=True)
     _adata: AnnData | None = field(init=False, default=None, repr=True)
     _adata_layer: str | None = field(init=False, default=None, repr=False)
+    _X: ArrayLike | None = field(init=False, default=None, repr=False)
+    _var_name_to_col: dict[str, int] | None = field(init=False, default=None, repr=False)
+    _var_items: tuple[str, ...] | None = field(init=False, default=None, repr=False)
+    _adata_layer_items: tuple[str, ...] | None = field(init=False, default=None, repr=False)
     _region_key: str | None = field(default=None, repr=True)
     _instance_key: str | None = field(default=None, repr=True)
     _color_by: str = field(default="", repr=True, init=False)
@@ -49,6 +55,23 @@ class DataModel:
             color_by=Event,
         )
 
+    @contextmanager
+    def batch_update(self) -> Iterator[None]:
+        """
+        Update several attributes of the model while emitting each event at most once.
+
+        Events emitted by the setters within the context are blocked and every event that was blocked at least once
+        is emitted a single time when the context exits.
+        """
+        blockers = {name: emitter.blocker() for name, emitter in self.events.emitters.items()}
+        with ExitStack() as stack:
+            for blocker in blockers.values():
+                stack.enter_context(blocker)
+            yield
+        for name, blocker in blockers.items():
+            if blocker.count:
+                self.events[name]()
+
     def get_items(self, attr: str) -> tuple[str, ...] | None:
         """
         Return valid keys for an attribute.
@@ -68,9 +91,24 @@ class DataModel:
         if attr == "columns_df" and self.layer is not None and (df_cols := self.layer.metadata.get("_columns_df")):
             return tuple(map(str, df_cols.columns))
         if attr == "var":
-            return tuple(map(str, getattr(self.adata, attr).index))
+            # the var names only change with the anndata object, so they are only converted once
+            if self._var_items is None:
+                self._var_items = tuple(map(str, self.adata.var.index))
+            return self._var_items
         return None
 
+    def get_adata_layers(self) -> tuple[str, ...]:
+        """
+        Return the names of the layers of the current anndata object.
+
+        Returns
+        -------
+        The layer names, which are only retrieved once per anndata object.
+        """
+        if self._adata_layer_items is None:
+            self._adata_layer_items = () if self.adata is None else tuple(self.adata.layers.keys())
+        return self._adata_layer_items
+
     @_ensure_dense_vector
     def get_obs(
         self, name: str, **_: Any
@@ -89,12 +127,9 @@ class DataModel:
         """
         if name not in self.adata.obs.columns:
             raise KeyError(f"Key `{name}` not found in `adata.obs`.")
-        if name != self.instance_key:
-            obs_column = self.adata.obs[[self.instance_key, name]]
-            obs_column = obs_column.set_index(self.instance_key)[name]
-        else:
-            obs_column = self.adata.obs[name].copy()
-            obs_column.index = self.adata.obs[self.instance_key]
+        # align the values to the instance ids positionally, without copying the obs columns or calling set_index
+        index = pd.Index(self.adata.obs[self.instance_key])
+        obs_column = pd.Series(self.adata.obs[name].array, index=index, name=name)
         return obs_column, self._format_key(name), obs_column.index
 
     @_ensure_dense_vector
@@ -133,13 +168,23 @@ class DataModel:
         -------
         The values, the formatted ``name`` and the `instance_key` values.
         """
-        try:
-            ix = self.adata._normalize_indices((slice(None), name))
-        except KeyError:
-            raise KeyError(f"Key `{name}` not found in `adata.var_names`.") from None
+        # the layer and the var name to column mapping only change with the anndata or the anndata layer
+        if self._X is None:
+            self._X = self.adata._get_X(layer=self.adata_layer)
+        if self._var_name_to_col is None:
+            var_names = self.adata.var_names
+            self._var_name_to_col = {n: i for i, n in enumerate(var_names)} if var_names.is_unique else {}
+
+        if isinstance(name, str) and (col := self._var_name_to_col.get(name)) is not None:
+            ix: Any = (slice(None), col)
+        else:
+            try:
+                ix = self.adata._normalize_indices((slice(None), name))
+            except KeyError:
+                raise KeyError(f"Key `{name}` not found in `adata.var_names`.") from None
 
-        column = self.adata._get_X(layer=self.adata_layer)[ix]
-        index = self.adata.obs[[self.instance_key]].set_index(self.instance_key).index
+        column = self._X[ix]
+        index = pd.Index(self.adata.obs[self.instance_key])
         return column, self._format_key(name, adata_layer=True), index
 
     @_ensure_dense_vector
@@ -163,7 +208,7 @@ class DataModel:
         res = self.adata.obsm[name]
         pretty_name = self._format_key(name, index=index)
 
-        adata_index = self.adata.obs[[self.instance_key]].set_index(self.instance_key).index
+        adata_index = pd.Index(self.adata.obs[self.instance_key])
         if isinstance(res, pd.DataFrame):
             try:
                 if isinstance(index, str):
@@ -180,7 +225,9 @@ class DataModel:
                 raise ValueError(
                     f"Unable to convert `{index}` to an integer when accessing `adata.obsm[{name!r}]`."
                 ) from None
-        res = np.asarray(res)
+        # select the column directly on sparse matrices instead of densifying the full obsm array
+        if not issparse(res) and not isinstance(res, np.ndarray):
+            res = np.asarray(res)
         column = res if res.ndim == 1 else res[:, index]
         return column, pretty_name, adata_index
 
@@ -238,6 +285,10 @@ class DataModel:
     @adata.setter
     def adata(self, adata: AnnData) -> None:
         self._adata = adata
+        self._X = None
+        self._var_name_to_col = None
+        self._var_items = None
+        self._adata_layer_items = None
         self.events.adata()
 
     @property
@@ -248,6 +299,7 @@ class DataModel:
     @adata_layer.setter
     def adata_layer(self, adata_layer: str) -> None:
         self._adata_layer = adata_layer
+        self._X = None
 
     @property
     def region_key(self) -> str | None:  # noqa: D102
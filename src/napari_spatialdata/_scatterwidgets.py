@@ -7,6 +7,7 @@ from typing import TYPE_CHECKING, Any
 import numpy as np
 import pandas as pd
 import pyqtgraph as pg
+import shapely
 from loguru import logger
 from napari.qt import get_current_stylesheet
 from napari.utils.colormaps import label_colormap
@@ -18,7 +19,7 @@ from pyqtgraph.Qt import QtCore, QtGui, QtWidgets
 from pyqtgraph.Qt.QtCore import pyqtSignal
 from pyqtgraph.widgets.ColorButton import ColorButton
 from qtpy.QtCore import QSize, Qt, Signal
-from qtpy.QtGui import QColor, QIcon
+from qtpy.QtGui import QBrush, QColor, QIcon
 from qtpy.QtWidgets import QPushButton
 from scipy.spatial import cKDTree
 from shapely.geometry import Point, Polygon
@@ -26,6 +27,7 @@ from spatialdata._types import ArrayLike
 
 from napari_spatialdata._model import DataModel
 from napari_spatialdata._widgets import AListWidget, ComponentWidget
+from napari_spatialdata.constants import config
 from napari_spatialdata.constants.config import POINT_SIZE_SCATTERPLOT_WIDGET
 
 __all__ = [
@@ -44,6 +46,8 @@ class ScatterListWidget(AListWidget):
         self.attrChanged.connect(self._onChange)
         self._color = color
         self._data: dict[str, Any] | None = None
+        # the attribute, item and index from which the current data were retrieved
+        self._data_key: tuple[str | None, str, int | str] | None = None
         self.itemClicked.connect(lambda item: self._onOneClick((item.text(),)))
 
     def _onChange(self) -> None:
@@ -53,8 +57,15 @@ class ScatterListWidget(AListWidget):
         self.chosen = None
 
     def _onAction(self, items: Iterable[str]) -> None:
-
-        for item in sorted(set(items)):
+        # a click passes a single item, which does not need to be deduplicated and sorted
+        if not (isinstance(items, tuple) and len(items) == 1):
+            items = sorted(set(items))
+        for item in items:
+            key = (self.getAttribute(), item, self.getIndex())
+            if self.data is not None and key == self._data_key:
+                # the data are reset on any change of the model, so they are still valid for the same item
+                self.chosen = item
+                continue
             try:
                 vec, _, _ = self._getter(item, index=self.getIndex())
             except Exception as e:  # noqa: BLE001
@@ -64,19 +75,26 @@ class ScatterListWidget(AListWidget):
             self.chosen = item
 
             if isinstance(vec, np.ndarray):
-                self.data = {"vec": vec}
+                # columns of e.g. obsm are strided views, store them contiguously for plotting and hit testing
+                self.data = {"vec": np.ascontiguousarray(vec)}
             elif vec is not None and isinstance(vec.dtype, (CategoricalDtype | bool)):
                 try:
                     sorted_set = sorted(set(vec), key=int)
                 except ValueError:
                     sorted_set = sorted(set(vec))
                 category_map = {category: index for index, category in enumerate(sorted_set)}
-                self.data = {"vec": np.array([category_map[cat] for cat in vec]), "labels": sorted_set}
+                # map the category codes to the sorted positions with a single gather instead of a lookup per value,
+                # the last entry is indexed by the code -1 of missing values
+                missing = next((index for index, category in enumerate(sorted_set) if pd.isna(category)), -1)
+                code_map = np.array([category_map.get(category, -1) for category in vec.cat.categories] + [missing])
+                self.data = {"vec": code_map[vec.cat.codes.to_numpy()], "labels": sorted_set}
 
             elif vec is None:
                 self.data = None
             else:
                 raise TypeError(f"The chosen field's datatype ({vec.dtype.name}) cannot be plotted")
+            if self.data is not None:
+                self._data_key = key
         return
 
     def _onOneClick(self, items: Iterable[str]) -> None:
@@ -140,6 +158,7 @@ class ScatterListWidget(AListWidget):
     @data.setter
     def data(self, data: None | dict[str, Any]) -> None:
         self._data = data
+        self._data_key = None
 
 
 class AxisWidgets(QtWidgets.QWidget):
@@ -299,7 +318,7 @@ class HoverScatterPlotItem(pg.PlotDataItem):
         else:
             scene_pos = event.scenePos()
             plot_pos = self.mapToParent(scene_pos)
-            widget.update_hover_highlight(plot_pos.x(), plot_pos.y())
+            widget.on_hover_event(plot_pos.x(), plot_pos.y())
 
 
 class PlotWidget(GraphicsLayoutWidget):
@@ -331,6 +350,9 @@ class PlotWidget(GraphicsLayoutWidget):
         self.x_label: str | None = "None"
         self.y_label: str | None = "None"
         self.brushes: list[Any] | None = None
+        # the brushes are shared per category or color level, the codes index the brush of every point in the table
+        self.brush_codes: ArrayLike | None = None
+        self.brush_table: list[QBrush] | None = None
         self.lut: pg.HistogramLUTItem | None = None
         self.discrete_color_widget: DiscreteColorWidget | None = None
         self.wrapped_widget: QtWidgets.QGraphicsProxyWidget | None = None
@@ -359,6 +381,12 @@ class PlotWidget(GraphicsLayoutWidget):
         self.debounce_timer.setSingleShot(True)
         self.debounce_timer.timeout.connect(self.on_debounced_zoom_event)
 
+        # Setup a timer for throttling the hover highlight
+        self.hover_timer = QtCore.QTimer()
+        self.hover_timer.setSingleShot(True)
+        self.hover_timer.timeout.connect(self.on_throttled_hover_event)
+        self.hover_pos: tuple[float, float] | None = None
+
         # initialize shapes info
         self.current_roi: ROI | None = None
         self.last_pos: tuple[Any, Any] | None = None
@@ -443,6 +471,16 @@ class PlotWidget(GraphicsLayoutWidget):
         # Update the proximity sensitivity
         self.update_proximity_sensitivity()
 
+    def on_hover_event(self, x: float, y: float) -> None:
+        # Update the hover highlight at most every 20ms with the latest cursor position
+        self.hover_pos = (x, y)
+        if not self.hover_timer.isActive():
+            self.hover_timer.start(20)
+
+    def on_throttled_hover_event(self) -> None:
+        if self.hover_pos is not None:
+            self.update_hover_highlight(*self.hover_pos)
+
     def resizeEvent(self, event: QtGui.QResizeEvent) -> None:
         """Resizing of the window."""
         super().resizeEvent(event)
@@ -484,6 +522,8 @@ class PlotWidget(GraphicsLayoutWidget):
 
     def clear_hover_highlight(self) -> None:
         """Clear the hover highlight."""
+        self.hover_timer.stop()
+        self.hover_pos = None
         self.hovered_point.setData([], [])
         self.data_point_label.setText("Value: N/A")
 
@@ -509,7 +549,7 @@ class PlotWidget(GraphicsLayoutWidget):
             self.discrete_color_widget.paletteChanged.connect(self.on_gradient_changed)
 
         self.brushes = self.get_brushes()
-        self.plot()
+        self.update_colors()
         self.scatter_plot.enableAutoRange("xy", True)
 
         # reset ROI modes
@@ -570,18 +610,27 @@ class PlotWidget(GraphicsLayoutWidget):
 
             return None
 
-        boolean_vector = np.zeros(len(self.scatter.xData), dtype=bool)
-
-        polygon_list = self.rois_to_polygons()
-
-        for i, (x, y) in enumerate(zip(self.scatter.xData, self.scatter.yData, strict=True)):
-            point = Point(x, y)
-            # Check if the point belongs to any ROI
-            for polygon in polygon_list:
-
-                if polygon.contains(point):
-                    boolean_vector[i] = True
-                    break
+        x = np.asarray(self.scatter.xData)
+        y = np.asarray(self.scatter.yData)
+        boolean_vector = np.zeros(len(x), dtype=bool)
+        # the k-d tree of the plotted points is only built when both x and y data are plotted
+        kd_tree = self.kd_tree if self.kd_tree is not None and self.kd_tree.n == len(x) else None
+
+        # Check for all points at once whether they belong to an ROI. Only the points near the ROI need the exact
+        # point in polygon test, either those within the circle around its bounding box found with the k-d tree or
+        # those within its bounding box.
+        for polygon in self.rois_to_polygons():
+            xmin, ymin, xmax, ymax = polygon.bounds
+            if kd_tree is not None:
+                center = ((xmin + xmax) / 2, (ymin + ymax) / 2)
+                radius = np.hypot(xmax - xmin, ymax - ymin) / 2
+                candidates = np.asarray(kd_tree.query_ball_point(center, radius), dtype=np.intp)
+            else:
+                candidates = np.flatnonzero((x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax))
+            # points that are already selected by a previous ROI are not tested again
+            candidates = candidates[~boolean_vector[candidates]]
+            shapely.prepare(polygon)
+            boolean_vector[candidates[shapely.contains_xy(polygon, x[candidates], y[candidates])]] = True
 
         return boolean_vector
 
@@ -595,8 +644,11 @@ class PlotWidget(GraphicsLayoutWidget):
 
             if isinstance(roi, pg.graphicsItems.ROI.PolyLineROI):
 
-                center_point = roi.getState()["pos"]
-                polygon_points = [center_point + x for x in roi.getState()["points"]]
+                # shift all vertices from the ROI to the plot coordinates at once
+                state = roi.getState()
+                polygon_points = np.asarray(state["points"], dtype=np.float64) + np.asarray(
+                    state["pos"], dtype=np.float64
+                )
                 polygon = Polygon(polygon_points)
 
             elif isinstance(roi, pg.graphicsItems.ROI.RectROI):
@@ -725,7 +777,9 @@ class PlotWidget(GraphicsLayoutWidget):
                 self.scatter_plot.removeItem(roi)
             self.roi_list = []
 
-        self.plot()
+            self.plot()
+        else:
+            self.update_colors()
 
         # rescale for new data
         if x_changed or y_changed:
@@ -757,7 +811,7 @@ class PlotWidget(GraphicsLayoutWidget):
                     x=self.x_data,
                     y=self.y_data,
                     pen=None,
-                    symbolPen=self.symbolPen,
+                    symbolPen=self.get_symbol_pen(),
                     symbol="o",
                     clear=True,
                     symbolBrush=self.brushes,
@@ -766,25 +820,25 @@ class PlotWidget(GraphicsLayoutWidget):
 
             # plot the pseudo scatter plot on x axis
             elif self.x_data is not None:
-                ps = pg.pseudoScatter(self.x_data)
+                ps = self.get_pseudo_scatter(self.x_data)
                 self.scatter = self.scatter_plot.plot(
                     self.x_data,
                     ps,
                     fillLevel=0,
                     pen=None,
-                    symbolPen=self.symbolPen,
+                    symbolPen=self.get_symbol_pen(),
                     symbolBrush=self.brushes,
                     clear=True,
                 )
             # plot the pseudo scatter plot on y axis
             elif self.y_data is not None:
-                ps = pg.pseudoScatter(self.y_data)
+                ps = self.get_pseudo_scatter(self.y_data)
                 self.scatter = self.scatter_plot.plot(
                     ps,
                     self.y_data,
                     fillLevel=0,
                     pen=None,
-                    symbolPen=self.symbolPen,
+                    symbolPen=self.get_symbol_pen(),
                     symbolBrush=self.brushes,
                     clear=True,
                 )
@@ -792,6 +846,78 @@ class PlotWidget(GraphicsLayoutWidget):
             for roi in self.roi_list:
                 self.scatter_plot.addItem(roi)
 
+    def update_colors(self) -> None:
+        """Update the colors of the plotted points, reusing the plotted scatter item if present."""
+
+        if self.scatter is None or self.brushes is None or self.scatter not in self.scatter_plot.listDataItems():
+            self.plot()
+            return
+
+        # per point brushes are not supported by setSymbolBrush, so the style options are updated directly
+        self.scatter.opts["symbolBrush"] = self.brushes
+        self.scatter.opts["symbolPen"] = self.get_symbol_pen()
+        self.scatter.updateItems(styleUpdate=True)
+
+    def patch_brushes(self, previous_codes: ArrayLike | None, previous_table: list[QBrush] | None) -> bool:
+        """
+        Restyle only the plotted points of which the brush color changed.
+
+        Parameters
+        ----------
+        previous_codes
+            The brush codes of the points before the brushes were regenerated.
+        previous_table
+            The shared brushes before the brushes were regenerated.
+
+        Returns
+        -------
+        Whether the brushes could be patched, if not the colors of all points need to be updated.
+        """
+        if (
+            self.scatter is None
+            or self.scatter not in self.scatter_plot.listDataItems()
+            or self.brush_codes is None
+            or self.brush_table is None
+            or previous_codes is None
+            or previous_table is None
+            or len(previous_table) != len(self.brush_table)
+            or len(self.scatter.scatter.data) != len(self.brush_codes)
+            or not np.array_equal(previous_codes, self.brush_codes)
+        ):
+            return False
+
+        changed_codes = [
+            code
+            for code, (previous, current) in enumerate(zip(previous_table, self.brush_table, strict=True))
+            if previous.color() != current.color()
+        ]
+        self.scatter.opts["symbolBrush"] = self.brushes
+        index = np.flatnonzero(np.isin(self.brush_codes, changed_codes))
+        if len(index) == 0:
+            return True
+
+        # the spots redraw their symbol with the new brush
+        spots = self.scatter.scatter.points()
+        for i in index:
+            spots[i].setBrush(self.brush_table[self.brush_codes[i]])
+        return True
+
+    def get_symbol_pen(self) -> QtGui.QPen | None:
+        """Get the outline pen of the plotted points, large data is plotted without outlines."""
+
+        data = self.x_data if self.x_data is not None else self.y_data
+        # drawing the outline of every point is a large part of the rendering time for many points
+        if data is not None and len(data) > config.SCATTER_OUTLINE_THRESHOLD:
+            return None
+        return self.symbolPen
+
+    def get_pseudo_scatter(self, data: ArrayLike) -> ArrayLike:
+        """Get the positions of the pseudo scatter plot for one dimensional data."""
+
+        # the exact method scales quadratically with the number of points, so large data is binned instead
+        method = "exact" if len(data) <= config.PSEUDO_SCATTER_THRESHOLD else "histogram"
+        return pg.pseudoScatter(np.asarray(data), method=method)
+
     def create_lut_hist(self) -> pg.HistogramLUTItem:
 
         # add the gradient widget with the histogram
@@ -818,8 +944,10 @@ class PlotWidget(GraphicsLayoutWidget):
 
     def on_gradient_changed(self) -> None:
         """Update the scatter plot colors when the gradient is changed."""
+        previous_codes, previous_table = self.brush_codes, self.brush_table
         self.brushes = self.get_brushes()
-        self.plot()
+        if not self.patch_brushes(previous_codes, previous_table):
+            self.update_colors()
 
     def wrap_discrete_color_widget(self) -> QtWidgets.QGraphicsProxyWidget:
         """Wrap the discrete color widget in a GraphicsWidget to make it scrollable."""
@@ -871,7 +999,12 @@ class PlotWidget(GraphicsLayoutWidget):
         if self.discrete_color_widget is not None:
 
             assert self.color_vec is not None
-            return [pg.mkBrush(*x) for x in self.discrete_color_widget.palette.map(self.color_vec + 1) * 255]
+            # map only the distinct categories and share one brush per category instead of one per point
+            categories, inverse = np.unique(self.color_vec, return_inverse=True)
+            # store the codes in the narrowest integer type, e.g. uint8 for up to 256 categories
+            self.brush_codes = inverse.ravel().astype(np.min_scalar_type(len(categories) - 1))
+            self.brush_table = [pg.mkBrush(*x) for x in self.discrete_color_widget.palette.map(categories + 1) * 255]
+            return [self.brush_table[i] for i in self.brush_codes]
 
         # for continuos data
         if self.lut is not None:
@@ -882,8 +1015,14 @@ class PlotWidget(GraphicsLayoutWidget):
             data = np.clip(self.color_vec, level_min, level_max)
             data = (data - level_min) / (level_max - level_min)
 
-            return [pg.mkBrush(*x) for x in self.lut.gradient.colorMap().map(data)]
+            # quantize the values to the 256 levels of a uint8 lookup table and share one brush per level
+            self.brush_codes = np.rint(np.nan_to_num(data, nan=0.0) * 255).astype(np.uint8).ravel()
+            lut = self.lut.gradient.colorMap().getLookupTable(nPts=256, alpha=True)
+            self.brush_table = [pg.mkBrush(*x) for x in lut]
+            return [self.brush_table[i] for i in self.brush_codes]
 
+        self.brush_codes = None
+        self.brush_table = None
         return None
 
     def mousePressEvent(self, event: Any) -> None:
@@ -986,7 +1125,7 @@ class PlotWidget(GraphicsLayoutWidget):
         self.cursor_position_label.setText(f"X: {plot_pos.x():.2f}, Y: {plot_pos.y():.2f}")
 
         # Call the hover highlight update function
-        self.update_hover_highlight(plot_pos.x(), plot_pos.y())
+        self.on_hover_event(plot_pos.x(), plot_pos.y())
 
     def mouseReleaseEvent(self, event: Any) -> None:
 
@@ -15,7 +15,7 @@ from napari.utils.notifications import show_info
 from packaging.version import parse as parse_version
 from qtpy.QtCore import QThread, Signal
 from qtpy.QtGui import QIcon
-from qtpy.QtWidgets import QLabel, QListWidget, QListWidgetItem, QProgressBar, QVBoxLayout, QWidget
+from qtpy.QtWidgets import QLabel, QListView, QListWidget, QListWidgetItem, QProgressBar, QVBoxLayout, QWidget
 from spatialdata import SpatialData
 from spatialdata.models._utils import DEFAULT_COORDINATE_SYSTEM
 
@@ -53,6 +53,8 @@ class ElementWidget(QListWidget):
         self._sdata = sdata
         self._duplicate_element_names, _ = get_duplicate_element_names(self._sdata)
         self._elements: None | dict[str, dict[str, str | int]] = None
+        # lay out the items in batches so the event loop keeps running when there are many elements
+        self.setLayoutMode(QListView.Batched)
 
     def _onItemChange(self, selected_coordinate_system: QListWidgetItem | int | Iterable[str]) -> None:
         self.clear()
@@ -61,33 +63,32 @@ class ElementWidget(QListWidget):
         self._elements = elements
 
     def _set_element_widget_items(self, elements: dict[str, dict[str, str | int]]) -> None:
-        for key, dict_val in sorted(elements.items(), key=itemgetter(0)):
-            sdata = self._sdata[dict_val["sdata_index"]]
-            element_type = dict_val["element_type"]
-            element_name = dict_val["original_name"]
-            item = QListWidgetItem(key)
-            if element_type == "shapes":
-                if (
-                    type((element := sdata.shapes[element_name]).iloc[0].geometry) is shapely.Point
-                    and len(element) > N_CIRCLES_WARNING_THRESHOLD
-                ):
-                    item.setIcon(self._icon)
-                    item.setToolTip(
-                        "Visualizing this many circles is currently slow in napari. Consider whether you want to "
-                        "visualize."
-                    )
-                    self.addItem(item)
+        # only repaint once all items are added
+        self.setUpdatesEnabled(False)
+        try:
+            sorted_elements = sorted(elements.items(), key=itemgetter(0))
+            # the items are created in a single call, only the items of large shapes elements are accessed afterwards
+            self.addItems([key for key, _ in sorted_elements])
+            for row, (_, dict_val) in enumerate(sorted_elements):
+                if dict_val["element_type"] != "shapes":
+                    continue
+                element = self._sdata[dict_val["sdata_index"]].shapes[dict_val["original_name"]]
+                geometry_type = type(element.geometry.iloc[0])
+                if geometry_type is shapely.Point and len(element) > N_CIRCLES_WARNING_THRESHOLD:
+                    warning = "Visualizing this many circles is currently slow in napari."
                 elif (
-                    type((element := sdata.shapes[element_name]).iloc[0].geometry)
-                    in [shapely.Polygon, shapely.MultiPolygon]
+                    geometry_type in (shapely.Polygon, shapely.MultiPolygon)
                     and len(element) > N_SHAPES_WARNING_THRESHOLD
                 ):
-                    item.setIcon(self._icon)
-                    item.setToolTip(
-                        "Visualizing this many shapes is currently slow in napari. Consider whether you want to "
-                        "visualize."
-                    )
-            self.addItem(item)
+                    warning = "Visualizing this many shapes is currently slow in napari."
+                else:
+                    continue
+                item = self.item(row)
+                assert item is not None
+                item.setIcon(self._icon)
+                item.setToolTip(f"{warning} Consider whether you want to visualize.")
+        finally:
+            self.setUpdatesEnabled(True)
 
 
 class CoordinateSystemWidget(QListWidget):
@@ -248,12 +249,15 @@ class SdataWidget(QWidget):
             for layer in self.viewer_model.viewer.layers:
                 element_name = layer.metadata.get("name")
                 if element_name:
+                    # only set the visibility when it changes, setting a layer visible refreshes the layer
                     if elements and (
                         layer.name not in elements or element_name != elements[layer.name]["original_name"]
                     ):
-                        layer.visible = False
+                        if layer.visible:
+                            layer.visible = False
                     elif layer.metadata["_active_in_cs"]:
-                        layer.visible = True
+                        if not layer.visible:
+                            layer.visible = True
                         # Prevent _update_visible_in_coordinate_system of invalid removal of coordinate system
                         layer.metadata["_active_in_cs"].add(coordinate_system)
                         layer.metadata["_current_cs"] = coordinate_system
@@ -261,11 +265,11 @@ class SdataWidget(QWidget):
     def _get_shapes(self, sdata: SpatialData, key: str, selected_cs: str, multi: bool) -> Shapes | Points:
         original_name = key[: key.rfind("_")] if multi else key
 
-        if type(sdata.shapes[original_name].iloc[0].geometry) is shapely.geometry.point.Point:
+        # only the first geometry is needed, rather than the full first row of the shapes element
+        geometry_type = type(sdata.shapes[original_name].geometry.iloc[0])
+        if geometry_type is shapely.geometry.point.Point:
             return self.viewer_model.get_sdata_circles(sdata, key, selected_cs, multi)
-        if (type(sdata.shapes[original_name].iloc[0].geometry) is shapely.geometry.polygon.Polygon) or (
-            type(sdata.shapes[original_name].iloc[0].geometry) is shapely.geometry.multipolygon.MultiPolygon
-        ):
+        if geometry_type in (shapely.geometry.polygon.Polygon, shapely.geometry.multipolygon.MultiPolygon):
             return self.viewer_model.get_sdata_shapes(sdata, key, selected_cs, multi)
 
         raise TypeError("Incorrect data type passed for shapes (should be Shapely Point or Polygon or MultiPolygon).")
@@ -1,25 +1,27 @@
 from __future__ import annotations
 
 from collections.abc import Sequence
-from typing import Any
+from functools import lru_cache
+from typing import Any, Literal
 
 import napari
 import numpy as np
 import pandas as pd
 import xarray
 from anndata import AnnData
+from dask.dataframe import DataFrame as DaskDataFrame
 from loguru import logger
 from matplotlib.colors import to_rgba_array
 from napari._qt.qt_resources import get_stylesheet
-from napari._qt.utils import QImg2array
 from napari.layers import Image, Labels, Layer, Points, Shapes
 from napari.layers._multiscale_data import MultiScaleData
 from napari.utils.events import Event
 from napari.utils.notifications import show_info
 from napari.viewer import Viewer
 from pandas.api.types import CategoricalDtype
-from qtpy import QtWidgets
+from qtpy import API_NAME, QtWidgets
 from qtpy.QtCore import Qt
+from qtpy.QtGui import QImage
 from qtpy.QtWidgets import (
     QComboBox,
     QDialog,
@@ -32,8 +34,8 @@ from qtpy.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
-from spatialdata import SpatialData, get_element_annotators, join_spatialelement_table
-from spatialdata.models import TableModel
+from spatialdata import SpatialData, get_element_annotators
+from spatialdata.models import get_table_keys
 
 from napari_spatialdata._annotationwidgets import MainWindow
 from napari_spatialdata._model import DataModel
@@ -50,7 +52,98 @@ from napari_spatialdata._widgets import (
 
 __all__ = ["QtAdataViewWidget", "QtAdataScatterWidget"]
 
-from napari_spatialdata.utils._utils import _get_init_table_list, block_signals
+from napari_spatialdata.utils._utils import _get_init_table_list, _join_region_table, block_signals
+
+
+def _get_layer_instances(layer: Layer) -> pd.Index | None:
+    """
+    Get the instances shown by a layer of a points or labels element, to join them with a table.
+
+    Joining the table with the instances of the layer, which are subsampled for large points elements, does not
+    require computing the full dask dataframe of the points element or the unique values of the labels element.
+    """
+    metadata = layer.metadata
+    sdata, name = metadata["sdata"], metadata.get("name")
+    if metadata.get("indices") is None or not (
+        isinstance(sdata.points.get(name), DaskDataFrame) or (isinstance(layer, Labels) and name in sdata.labels)
+    ):
+        return None
+    return pd.Index(metadata["indices"])
+
+
+def _constant_categorical(value: str, n: int) -> pd.Categorical:
+    """Create a categorical of length `n` with all values equal to `value`, from codes instead of a list of values."""
+    return pd.Categorical.from_codes(
+        np.zeros(n, dtype=np.int8), categories=pd.Index([value] if n else [], dtype=object)
+    )
+
+
+def _get_shown(model: DataModel) -> tuple[Layer | None, AnnData | None]:
+    """Get the active layer and anndata object of the model, to record what the adata widgets show."""
+    return model.layer, model.adata
+
+
+def _is_shown(shown: tuple[Layer | None, AnnData | None] | None, model: DataModel) -> bool:
+    """Whether the active layer and anndata object of the model are `shown`, as recorded by :func:`_get_shown`."""
+    # the model also emits the adata event when the active layer and its anndata object did not change, e.g.
+    # when another widget sharing the model selects the same layer, in which case the widgets already show them
+    return shown is not None and shown[0] is model.layer and shown[1] is model.adata
+
+
+def _set_table_adata(
+    model: DataModel, layer: Layer | None, table_name_widget: QComboBox, how: Literal["left", "inner"]
+) -> bool:
+    """
+    Join the table selected in the table name widget with the element of the layer and set it in the model.
+
+    Parameters
+    ----------
+    model
+        The model of the widget.
+    layer
+        The active layer, if any.
+    table_name_widget
+        The widget in which the table name is selected.
+    how
+        The type of join of the table with the element.
+
+    Returns
+    -------
+    Whether an anndata object with observations or variables is set in the model.
+    """
+    if (table_name := table_name_widget.currentText()) == "" or layer is None:
+        return False
+    model.active_table_name = table_name
+
+    if sdata := layer.metadata.get("sdata"):
+        element_name = layer.metadata.get("name")
+        table = _join_region_table(sdata, table_name, element_name, how=how, instances=_get_layer_instances(layer))
+        layer.metadata["adata"] = table
+
+    with model.events.adata.blocker():
+        model.adata = layer.metadata.get("adata")
+
+    if model.adata.shape == (0, 0):
+        return False
+
+    model.system_name = layer.metadata.get("name", None)
+    return True
+
+
+def _set_items(widget: QComboBox, items: Sequence[str | None]) -> None:
+    """Show the items in the combobox with the first item selected, refilling it only if the items changed."""
+    # None items, e.g. a missing table name, are not shown
+    texts = [item for item in items if item is not None]
+    if [widget.itemText(i) for i in range(widget.count())] != texts:
+        widget.clear()
+        widget.addItems(texts)
+    widget.setCurrentIndex(0)
+
+
+@lru_cache(maxsize=2)
+def _get_stylesheet(theme_id: str) -> str:
+    # napari reads and templates all its qss files for each call, the result only depends on the theme
+    return str(get_stylesheet(theme_id))
 
 
 class QtAdataScatterWidget(QWidget):
@@ -60,6 +153,8 @@ class QtAdataScatterWidget(QWidget):
         self, napari_viewer: Viewer | None = None, model: DataModel | None = None, adata: AnnData | None = None
     ):
         super().__init__()
+        # the layer and anndata object the widgets were last filled with
+        self._shown: tuple[Layer | None, AnnData | None] | None = None
 
         if napari_viewer is not None:
             self._viewer = napari_viewer
@@ -71,8 +166,8 @@ class QtAdataScatterWidget(QWidget):
             )
 
             self._select_layer()
+            # _select_layer updates the model, whose adata event refreshes the widgets through _on_selection once
             self._viewer.layers.selection.events.changed.connect(self._select_layer)
-            self._viewer.layers.selection.events.changed.connect(self._on_selection)
 
         elif adata is not None:
 
@@ -86,7 +181,7 @@ class QtAdataScatterWidget(QWidget):
             temp = {"region": "na", "region_key": "na", "instance_key": col}
             self._model.adata.uns["spatialdata_attrs"] = temp
 
-            self.setStyleSheet(get_stylesheet("dark"))
+            self.setStyleSheet(_get_stylesheet("dark"))
 
         else:
             raise ValueError("Either napari viewer or adata object must be provided.")
@@ -127,16 +222,7 @@ class QtAdataScatterWidget(QWidget):
         control_layout.addWidget(self.color_widget, 1, 2, 1, 1)
 
         self.plot_button_widget = QPushButton("Plot")
-        self.plot_button_widget.clicked.connect(
-            lambda: self.plot_widget._onClick(
-                self.x_widget.widget.data,
-                self.y_widget.widget.data,
-                self.color_widget.widget.data,
-                self.x_widget.getFormattedLabel(),
-                self.y_widget.getFormattedLabel(),
-                self.color_widget.getFormattedLabel(),
-            )
-        )
+        self.plot_button_widget.clicked.connect(self._plot)
 
         self.annotate_button_widget = QPushButton("Annotate")
         self.annotate_button_widget.clicked.connect(self.export)
@@ -152,9 +238,9 @@ class QtAdataScatterWidget(QWidget):
         control_layout.addWidget(self.status_label, 3, 0, 1, 3)
 
         if self._viewer is not None:
-            if self._viewer.layers.selection.active is not None:
-                if "sdata" in self._viewer.layers.selection.active.metadata:
-                    if self._viewer.layers.selection.active.metadata["sdata"].is_backed():
+            if (active_layer := self._viewer.layers.selection.active) is not None:
+                if "sdata" in active_layer.metadata:
+                    if active_layer.metadata["sdata"].is_backed():
                         self.change_status("Sdata is backed - annotations can be saved.")
                     else:
                         self.change_status("Sdata present but not backed - annotations can be created but not saved.")
@@ -172,6 +258,16 @@ class QtAdataScatterWidget(QWidget):
 
         self.model.events.adata.connect(self._on_selection)
 
+    def _plot(self) -> None:
+        self.plot_widget._onClick(
+            self.x_widget.widget.data,
+            self.y_widget.widget.data,
+            self.color_widget.widget.data,
+            self.x_widget.getFormattedLabel(),
+            self.y_widget.getFormattedLabel(),
+            self.color_widget.getFormattedLabel(),
+        )
+
     def change_status(self, new_status: str) -> None:
         """Change the status label text."""
         self.status_label.setText(f"Status: {new_status}")
@@ -230,10 +326,8 @@ class QtAdataScatterWidget(QWidget):
                         sel_obs = sel_obs.drop(self.annotation_name, axis=1)
 
                     columns_to_add = [col for col in self.model.adata.obs.columns if col not in sel_obs.columns]
-                    merge_on = [
-                        self.model.adata.uns["spatialdata_attrs"]["region_key"],
-                        self.model.adata.uns["spatialdata_attrs"]["instance_key"],
-                    ]
+                    _, region_key, instance_key = get_table_keys(self.model.adata)
+                    merge_on = [region_key, instance_key]
 
                     new_df = pd.merge(sel_obs, self.model.adata.obs[merge_on + columns_to_add], on=merge_on, how="left")
                     new_df[self.annotation_name] = new_df[self.annotation_name].astype("category")
@@ -337,31 +431,12 @@ class QtAdataScatterWidget(QWidget):
                     self.change_status("Data not saved. Only h5ad, zarr and csv are supported.")
 
     def _update_adata(self) -> None:
-        if (table_name := self.table_name_widget.currentText()) == "":
-            return
-        self.model.active_table_name = table_name
-        layer = self._viewer.layers.selection.active
-
-        if sdata := layer.metadata.get("sdata"):
-            element_name = layer.metadata.get("name")
-            _, table = join_spatialelement_table(
-                sdata=sdata, spatial_element_names=element_name, table_name=table_name, how="left"
-            )
-            layer.metadata["adata"] = table
-
-        if layer is not None:
-            if "adata" in layer.metadata:
-                with self.model.events.adata.blocker():
-                    self.model.adata = layer.metadata["adata"]
-            else:
-                with self.model.events.adata.blocker():
-                    self.model.adata = None
-
-        if self.model.adata.shape == (0, 0):
-            return
-
-        self.model.system_name = layer.metadata.get("name", None)
+        if self._set_table_adata():
+            self._refresh_adata_widgets()
 
+    def _refresh_adata_widgets(self) -> None:
+        """Fill the axis and color widgets with the anndata object of the model."""
+        self._shown = _get_shown(self.model)
         self.x_widget.widget._onChange()
         self.x_widget.component_widget._onChange()
         self.y_widget.widget._onChange()
@@ -369,44 +444,58 @@ class QtAdataScatterWidget(QWidget):
         self.color_widget.widget._onChange()
         self.color_widget.component_widget._onChange()
 
+    def _set_table_adata(self) -> bool:
+        """Join the table selected in the table name widget with the layer element and set it in the model."""
+        return _set_table_adata(self.model, self._viewer.layers.selection.active, self.table_name_widget, how="left")
+
     def _on_selection(self, event: Any) -> None:
+        if _is_shown(self._shown, self.model):
+            return
         self.x_widget.widget.clear()
         self.y_widget.widget.clear()
         self.color_widget.widget.clear()
 
-        self.table_name_widget.clear()
-        self.table_name_widget.clear()
-        if event.source == self.model or event.source.active:
-            table_list = _get_init_table_list(self.viewer.layers.selection.active)
+        # the table name signal is blocked while refilling the widget, the selected table is then joined only once
+        with block_signals(self.table_name_widget):
+            table_list = None
+            if event.source == self.model or event.source.active:
+                table_list = _get_init_table_list(self.viewer.layers.selection.active)
             if table_list:
                 self.model.table_names = table_list
-                self.table_name_widget.addItems(table_list)
-                widget_index = self.table_name_widget.findText(table_list[0])
-                self.table_name_widget.setCurrentIndex(widget_index)
-        self.x_widget.widget._onChange()
-        self.x_widget.component_widget._onChange()
-        self.y_widget.widget._onChange()
-        self.y_widget.component_widget._onChange()
-        self.color_widget.widget._onChange()
-        self.color_widget.component_widget._onChange()
+                _set_items(self.table_name_widget, table_list)
+            else:
+                self.table_name_widget.clear()
+        if table_list:
+            self._set_table_adata()
+        self._refresh_adata_widgets()
 
     def _select_layer(self) -> None:
         """Napari layers."""
         layer = self._viewer.layers.selection.active
-        self.model.layer = layer
-        if not hasattr(layer, "metadata") or not isinstance(layer.metadata.get("adata"), AnnData):
-            if hasattr(self, "x_widget"):
-                self.table_name_widget.clear()
-                self.x_widget.clear()
-                self.y_widget.clear()
-                self.color_widget.clear()
-            return
-
-        if layer is not None:
-            self.model.adata = layer.metadata.get("adata", None)
+        with self.model.batch_update():
+            self.model.layer = layer
+            if not hasattr(layer, "metadata") or not isinstance(layer.metadata.get("adata"), AnnData):
+                if hasattr(self, "x_widget"):
+                    self.table_name_widget.clear()
+                    self.x_widget.clear()
+                    self.y_widget.clear()
+                    self.color_widget.clear()
+                return
+
+            if layer is not None:
+                self.model.adata = layer.metadata.get("adata", None)
 
     def screenshot(self) -> Any:
-        return QImg2array(self.grab().toImage())
+        # converting to RGBA8888 gives the channels in array order, so the buffer is copied once without reordering
+        img = self.grab().toImage().convertToFormat(QImage.Format_RGBA8888)
+        shape = (img.height(), img.width(), 4)
+        if (bits := img.constBits()) is None:
+            raise RuntimeError("Unable to read the pixels of the widget screenshot.")
+        if API_NAME.startswith("PySide"):
+            return np.array(bits, dtype=np.uint8).reshape(shape)
+        bits.setsize(img.sizeInBytes())
+        # the sip voidptr supports the buffer protocol, which its stubs do not declare
+        return np.frombuffer(bits, dtype=np.uint8).reshape(shape).copy()  # type: ignore[call-overload]
 
     @property
     def viewer(self) -> napari.Viewer:
@@ -424,6 +513,8 @@ class QtAdataViewWidget(QWidget):
 
     def __init__(self, napari_viewer: Viewer, model: DataModel | None = None) -> None:
         super().__init__()
+        # the layer and anndata object the widgets were last filled with
+        self._shown: tuple[Layer | None, AnnData | None] | None = None
 
         self._viewer = napari_viewer
         self._model = model if model else napari_viewer.window._dock_widgets["SpatialData"].widget().viewer_model._model
@@ -566,106 +657,91 @@ class QtAdataViewWidget(QWidget):
 
     def _on_layer_update(self, event: Any | None = None) -> None:
         """When the model updates the selected layer, update the relevant widgets."""
+        if _is_shown(self._shown, self.model):
+            return
         logger.debug("Updating layer.")
 
-        self.table_name_widget.clear()
-
-        table_list = _get_init_table_list(self.viewer.layers.selection.active)
+        # the table name signal is blocked while refilling the widget, the selected table is then joined only once
+        with block_signals(self.table_name_widget):
+            table_list = _get_init_table_list(self.viewer.layers.selection.active)
+            if table_list:
+                self.model.table_names = table_list
+                _set_items(self.table_name_widget, table_list)
+            else:
+                self.table_name_widget.clear()
         if table_list:
-            self.model.table_names = table_list
-            self.table_name_widget.addItems(table_list)
-            widget_index = self.table_name_widget.findText(table_list[0])
-            self.table_name_widget.setCurrentIndex(widget_index)
-        self.adata_layer_widget.clear()
-        self.adata_layer_widget.addItem("X", None)
-        self.adata_layer_widget.addItems(self._get_adata_layer())
+            self._set_table_adata()
         self.dataframe_columns_widget.clear()
         if self.model.layer is not None and (cols_df := self.model.layer.metadata.get("_columns_df")) is not None:
             self.dataframe_columns_widget.addItems(map(str, cols_df.columns))
-        self.obs_widget._onChange()
-        self.var_widget._onChange()
-        self.obsm_widget._onChange()
+        self._refresh_adata_widgets()
 
     def _select_layer(self) -> None:
         """Napari layers."""
         layer = self._viewer.layers.selection.active
-        self.model.layer = layer
-        if not hasattr(layer, "metadata") or not isinstance(layer.metadata.get("adata", None), AnnData):
-            if hasattr(self, "obs_widget"):
-                self.table_name_widget.clear()
-                self.adata_layer_widget.clear()
-                self.dataframe_columns_widget.clear()
-                self.obs_widget.clear()
-                self.var_widget.clear()
-                self.obsm_widget.clear()
-                self.color_by.clear()
-                if isinstance(layer, Points | Shapes) and (cols_df := layer.metadata.get("_columns_df")) is not None:
-                    self.dataframe_columns_widget.addItems(map(str, cols_df.columns))
-                    self.model.system_name = layer.metadata.get("name", None)
-            self.model.adata = None
-            return
+        # the layer and adata events are emitted once all attributes of the model are updated, which also updates the
+        # widgets once the widget has been initialized
+        with self.model.batch_update():
+            self.model.layer = layer
+            if not hasattr(layer, "metadata") or not isinstance(layer.metadata.get("adata", None), AnnData):
+                if hasattr(self, "obs_widget"):
+                    self.table_name_widget.clear()
+                    self.adata_layer_widget.clear()
+                    self.dataframe_columns_widget.clear()
+                    self.obs_widget.clear()
+                    self.var_widget.clear()
+                    self.obsm_widget.clear()
+                    self.color_by.clear()
+                    if (
+                        isinstance(layer, Points | Shapes)
+                        and (cols_df := layer.metadata.get("_columns_df")) is not None
+                    ):
+                        self.dataframe_columns_widget.addItems(map(str, cols_df.columns))
+                        self.model.system_name = layer.metadata.get("name", None)
+                self.model.adata = None
+                return
 
-        if layer is not None:
-            self.model.adata = layer.metadata.get("adata", None)
+            if layer is not None:
+                self.model.adata = layer.metadata.get("adata", None)
 
-        if self.model.adata.shape == (0, 0):
-            return
+            if self.model.adata.shape == (0, 0):
+                return
 
-        self.model._region_key = layer.metadata["region_key"] if isinstance(layer, Labels) else None
-        self.model._instance_key = layer.metadata["instance_key"] if isinstance(layer, Labels) else None
-        self.model.system_name = layer.metadata.get("name", None)
-
-        if hasattr(
-            self, "obs_widget"
-        ):  # to check if the widget has been already initialized, layer update should only be called on layer change
-            self._on_layer_update()
-        else:
-            return
+            self.model._region_key = layer.metadata["region_key"] if isinstance(layer, Labels) else None
+            self.model._instance_key = layer.metadata["instance_key"] if isinstance(layer, Labels) else None
+            self.model.system_name = layer.metadata.get("name", None)
 
     def _update_adata(self) -> None:
-        if (table_name := self.table_name_widget.currentText()) == "":
-            return
-        self.model.active_table_name = table_name
+        # to check if the widget has been already initialized, layer update should only be called on layer change
+        if self._set_table_adata() and hasattr(self, "obs_widget"):
+            self._refresh_adata_widgets()
+
+    def _refresh_adata_widgets(self) -> None:
+        """Fill the anndata layer and list widgets with the anndata object of the model."""
+        self._shown = _get_shown(self.model)
+        self._update_adata_layer_widget()
+        self.obs_widget._onChange()
+        self.var_widget._onChange()
+        self.obsm_widget._onChange()
 
+    def _set_table_adata(self) -> bool:
+        """Join the table selected in the table name widget with the layer element and set it in the model."""
         layer = self._viewer.layers.selection.active
+        how: Literal["left", "inner"] = "left" if isinstance(layer, Labels) else "inner"
+        return _set_table_adata(self.model, layer, self.table_name_widget, how=how)
 
-        if sdata := layer.metadata.get("sdata"):
-            element_name = layer.metadata.get("name")
-            how = "left" if isinstance(layer, Labels) else "inner"
-            _, table = join_spatialelement_table(
-                sdata=sdata, spatial_element_names=element_name, table_name=table_name, how=how
-            )
-            layer.metadata["adata"] = table
-
-        if layer is not None:
-            if "adata" in layer.metadata:
-                with self.model.events.adata.blocker():
-                    self.model.adata = layer.metadata["adata"]
-            else:
-                with self.model.events.adata.blocker():
-                    self.model.adata = None
-
-        if self.model.adata.shape == (0, 0):
-            return
-
-        self.model.system_name = layer.metadata.get("name", None)
-
-        if hasattr(
-            self, "obs_widget"
-        ):  # to check if the widget has been already initialized, layer update should only be called on layer change
+    def _update_adata_layer_widget(self) -> None:
+        # the anndata layer is only set once the widget is refilled, instead of for each of the intermediate items
+        with block_signals(self.adata_layer_widget):
             self.adata_layer_widget.clear()
             self.adata_layer_widget.addItem("X", None)
             self.adata_layer_widget.addItems(self._get_adata_layer())
-            self.obs_widget._onChange()
-            self.var_widget._onChange()
-            self.obsm_widget._onChange()
-        else:
-            return
+        self.var_widget.setAdataLayer(self.adata_layer_widget.currentText())
 
     def _get_adata_layer(self) -> Sequence[str | None]:
         if self.model.adata is None:
             return [None]
-        adata_layers = list(self.model.adata.layers.keys())
+        adata_layers = list(self.model.get_adata_layers())
         if len(adata_layers) == 0:
             return [None]
         return adata_layers
@@ -727,6 +803,7 @@ class QtAdataAnnotationWidget(QWidget):
         self.viewer.layers.events.inserted.connect(self._on_inserted)
         self.viewer.layers.events.inserted.connect(self._set_editable_save_button)
         self.viewer.layers.events.inserted.connect(self._set_clickable_buttons)
+        self.viewer.layers.events.removed.connect(self._on_removed)
         self.viewer.layers.selection.events.changed.connect(self._on_layer_selection_changed)
         self.viewer.layers.selection.events.changed.connect(self._set_editable_save_button)
         self.viewer.layers.selection.events.changed.connect(self._set_clickable_buttons)
@@ -734,7 +811,6 @@ class QtAdataAnnotationWidget(QWidget):
         self._on_layer_selection_changed()
 
         if isinstance(layer := self.viewer.layers.selection.active, Shapes):
-            layer.events.name.connect(self._change_region_on_name_change)
             self._connect_layer_events(layer)
 
     def _connect_button_to_change_color(self, button: QPushButton) -> None:
@@ -781,8 +857,8 @@ class QtAdataAnnotationWidget(QWidget):
         layer.current_edge_color = self._current_color
 
         if color_button == self.annotation_widget.tree_view.indexWidget(color_ind):
-            self._viewer.layers.selection.active.current_face_color = color
-            self._viewer.layers.selection.active.current_edge_color = color
+            layer.current_face_color = color
+            layer.current_edge_color = color
             self._current_color = color
 
     def _set_current_description(self) -> None:
@@ -808,12 +884,23 @@ class QtAdataAnnotationWidget(QWidget):
 
     def _connect_layer_events(self, layer: Shapes) -> None:
         if layer and isinstance(layer, Shapes):
+            # napari ignores connecting an already connected callback, the mouse move callbacks are a plain list
             layer.events.data.connect(self._update_annotations)
             layer.events.name.connect(self._change_region_on_name_change)
-            layer.mouse_move_callbacks.append(self._on_mouse_move)
+            if self._on_mouse_move not in layer.mouse_move_callbacks:
+                layer.mouse_move_callbacks.append(self._on_mouse_move)
             self._current_region = layer.name
             layer.current_face_color = self._current_color
 
+    def _on_removed(self, event: Event) -> None:
+        """Disconnect the annotation callbacks of a shapes layer removed from the viewer."""
+        layer = event.value
+        if isinstance(layer, Shapes):
+            layer.events.data.disconnect(self._update_annotations)
+            layer.events.name.disconnect(self._change_region_on_name_change)
+            if self._on_mouse_move in layer.mouse_move_callbacks:
+                layer.mouse_move_callbacks.remove(self._on_mouse_move)
+
     def _on_mouse_move(self, layer: Layer, event: Event) -> None:
         if layer == self.viewer.layers.selection.active:
             if (shape_index := layer.get_value(event.position)[0]) is not None:
@@ -848,11 +935,11 @@ class QtAdataAnnotationWidget(QWidget):
                 n_obs = len(layer.data)
                 df = pd.DataFrame(
                     {
-                        "class": pd.Series(pd.Categorical([self._current_class] * n_obs), dtype="category"),
-                        "class_color": pd.Series([self._current_color] * n_obs, dtype="category"),
-                        "description": pd.Series([""] * n_obs, dtype="str"),
-                        "annotator": pd.Series([""] * n_obs, dtype="category"),
-                        "region": pd.Series([layer.name] * n_obs, dtype="category"),
+                        "class": _constant_categorical(self._current_class, n_obs),
+                        "class_color": _constant_categorical(self._current_color, n_obs),
+                        "description": np.full(n_obs, "", dtype=object),
+                        "annotator": _constant_categorical("", n_obs),
+                        "region": _constant_categorical(layer.name, n_obs),
                     }
                 )
                 layer.features = df
@@ -866,7 +953,10 @@ class QtAdataAnnotationWidget(QWidget):
             ):
                 color_column_name = color_cols[0]
                 class_column_name = color_column_name.split("_")[0]
-                color_dict = layer.features.copy().set_index(class_column_name)[color_column_name].to_dict()
+                # pair the two columns directly instead of copying all the features on every selection change
+                color_dict = dict(
+                    zip(layer.features[class_column_name], layer.features[color_column_name], strict=True)
+                )
 
                 for class_name, color in color_dict.items():
                     if class_name != "undefined":
@@ -893,24 +983,27 @@ class QtAdataAnnotationWidget(QWidget):
         Update annotations in layer.features.
 
         When adding an element on the shapes layer, a new row with Nans is automatically added to layer.features by
-        napari itself. This row needs to be replaced with the values we want. This function checks whether we added
-        a single shape and then calls the respective function to update the last row of layer.features.
+        napari itself. This row needs to be replaced with the values we want. This function calls the respective
+        function to update the rows of layer.features of all the added shapes at once.
 
         event
             The napari event for changes being made on the layer, namely "adding", "added", "changing", "changed,
             "removing" or "removed". Here we only deal with "added" currently, but this could be changed later.
         """
         layer = event.source
-        columns_to_convert = ["class", "class_color", "annotator", self._current_region_key]
-        if not isinstance(layer.features["class"], CategoricalDtype):
+        # only convert the columns that are not categorical yet, instead of converting all features on every event
+        columns_to_convert = [
+            column
+            for column in ["class", "class_color", "annotator", self._current_region_key]
+            if not isinstance(layer.features[column].dtype, CategoricalDtype)
+        ]
+        if columns_to_convert:
             layer.features[columns_to_convert] = layer.features[columns_to_convert].astype("category")
-        if event.action == "added" and len(event.data_indices) == 1:
-            self._update_layer_features(layer, event.action)
-        elif event.action == "added" and len(event.data_indices) > 1:
-            raise ValueError(f"Can only add one annotation at the time, got {len(event.data_indices)}")
+        if event.action == "added":
+            self._update_layer_features(layer, event.action, event.data_indices)
 
-    def _update_layer_features(self, layer: Layer, action: str) -> None:
-        """Add categories to respective column if not present yet and update last row of layer.features."""
+    def _update_layer_features(self, layer: Layer, action: str, data_indices: Sequence[int] = (-1,)) -> None:
+        """Add categories to respective column if not present yet and update the rows of the added shapes."""
         self._add_categories(layer)
         if action == "added":
             row = [
@@ -920,7 +1013,8 @@ class QtAdataAnnotationWidget(QWidget):
                 self._current_annotator,
                 self._current_region,
             ]
-            layer.features.loc[len(layer.features) - 1] = row
+            # the row is broadcast to all the added shapes, e.g. when setting the data of the layer, in a single write
+            layer.features.iloc[list(data_indices)] = row
 
         self._set_editable_save_button()
 
@@ -974,8 +1068,8 @@ class QtAdataAnnotationWidget(QWidget):
             self._current_color = color
 
             if layer.mode != "select":
-                self._viewer.layers.selection.active.current_face_color = color
-                self._viewer.layers.selection.active.current_edge_color = color
+                layer.current_face_color = color
+                layer.current_edge_color = color
 
     def _set_current_annotator(self) -> None:
         """Update current annotator when the text of the annotator dropdown has changed."""
@@ -1005,16 +1099,20 @@ class QtAdataAnnotationWidget(QWidget):
             color_column = [key for key in table.uns if "color" in key][0]
             color_dict = table.uns[color_column]
 
-            self._current_region_key = table.uns[TableModel.ATTRS_KEY][TableModel.REGION_KEY_KEY]
-            self._current_instance_key = table.uns[TableModel.ATTRS_KEY][TableModel.INSTANCE_KEY]
+            _, self._current_region_key, self._current_instance_key = get_table_keys(table)
             layer.metadata["annotation_region_key"] = self._current_region_key
             layer.metadata["annotation_instance_key"] = self._current_instance_key
 
-            feature_df = table.obs.copy().drop(columns=[self._current_instance_key])
+            # drop already returns a new dataframe, the columns added below are not added to the table
+            feature_df = table.obs.drop(columns=[self._current_instance_key])
             class_column = color_column.rpartition("_")[0]
             feature_df[color_column] = feature_df[class_column].map(color_dict)
             feature_df[color_column] = feature_df[color_column].astype("category")
-            color_array = to_rgba_array(feature_df[color_column])
+            # convert each of the few class colors once and gather them per shape, instead of parsing every row
+            colors = feature_df[color_column]
+            if colors.isna().any():
+                raise ValueError(f"Not all classes in `{class_column}` have a color in `{color_column}`.")
+            color_array = to_rgba_array(colors.cat.categories)[colors.cat.codes.to_numpy()]
             layer.face_color = color_array
             layer.edge_color = color_array
 
@@ -1025,17 +1123,18 @@ class QtAdataAnnotationWidget(QWidget):
                 feature_df["description"] = pd.Series([""] * len(feature_df), dtype="str", index=feature_df.index)
 
             if "annotator" in feature_df.columns:
-                annotators = list(feature_df["annotator"].cat.categories)
-                self.annotation_widget.annotators.clear()
-                self.annotation_widget.annotators.addItems(annotators)
-                self.annotation_widget.annotators.setCurrentText(annotators[0])
+                # re-importing a table keeps the annotator items, the current annotator is then only updated once
+                with block_signals(self.annotation_widget.annotators):
+                    _set_items(self.annotation_widget.annotators, feature_df["annotator"].cat.categories.to_list())
+                self._set_current_annotator()
             else:
                 feature_df["annotator"] = pd.Series([""] * len(feature_df), dtype="category", index=feature_df.index)
 
-            feature_df.rename(columns={class_column: "class", class_column + "_color": "class_color"}, inplace=True)
+            # select the columns by their table names and only relabel the selection, instead of renaming all columns
             feature_df = feature_df.reindex(
-                columns=["class", "class_color", "description", "annotator", self._current_region_key]
+                columns=[class_column, class_column + "_color", "description", "annotator", self._current_region_key]
             )
+            feature_df.columns = ["class", "class_color", "description", "annotator", self._current_region_key]
             layer.features = feature_df
 
             # for class_name, color in color_dict.items():
@@ -1117,27 +1216,26 @@ class QtAdataAnnotationWidget(QWidget):
         layer = self.viewer.layers.selection.active
         if len(elements := layer.selected_data) == 1:
             self._add_categories(layer)
-            self._viewer.layers.selection.active.current_face_color = self._current_color
-            self._viewer.layers.selection.active.current_edge_color = self._current_color
+            layer.current_face_color = self._current_color
+            layer.current_edge_color = self._current_color
             description = self.annotation_widget.description_box.toPlainText()
             self.annotation_widget.description_box.clear()
             self._current_description = ""
             annotator = self.annotation_widget.annotators.currentText()
 
-            row = layer.features.loc[list(elements)]
-            row["class"] = self._current_class
-            row["class_color"] = self._current_color
-            row["description"] = description
-            row["annotator"] = annotator
-            layer.features.loc[list(elements)] = row
+            # write the values of the selected element directly, instead of copying its row and writing the copy back
+            layer.features.loc[next(iter(elements)), ["class", "class_color", "description", "annotator"]] = [
+                self._current_class,
+                self._current_color,
+                description,
+                annotator,
+            ]
         elif len(elements) >= 1:
             show_info("Can only set the description and class of one element at the time")
         else:
             show_info("No element in the layer selected")
 
     def _change_region_on_name_change(self, event: Event) -> None:
-        self._current_region = event.source.name
+        self._current_region = region = event.source.name
         if len(event.source.features) != 0:
-            event.source.features[self._current_region_key] = pd.Series(
-                [self._current_region] * len(event.source.data), dtype="category"
-            )
+            event.source.features[self._current_region_key] = _constant_categorical(region, len(event.source.data))
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import re
+import weakref
+from collections import OrderedDict
 from typing import TYPE_CHECKING, Any
 
 import numpy as np
 import packaging.version
 import pandas as pd
+import shapely
 from anndata import AnnData
 from dask.dataframe import DataFrame as DaskDataFrame
 from geopandas import GeoDataFrame
@@ -13,12 +16,12 @@ from loguru import logger
 from napari import Viewer
 from napari.layers import Image, Labels, Points, Shapes
 from napari.utils.notifications import show_info
+from napari.utils.transforms import Affine as NapariAffine
 from qtpy.QtCore import QObject, Signal
 from shapely import Polygon
 from spatialdata import get_element_annotators, get_element_instances
-from spatialdata._core.query.relational_query import _left_join_spatialelement_table
 from spatialdata._types import ArrayLike
-from spatialdata.models import PointsModel, ShapesModel, TableModel, force_2d, get_channels
+from spatialdata.models import PointsModel, ShapesModel, TableModel, force_2d, get_channels, get_table_keys
 from spatialdata.transformations import Affine, Identity
 
 from napari_spatialdata._model import DataModel
@@ -29,7 +32,7 @@ from napari_spatialdata.utils._utils import (
     _get_ellipses_from_circles,
     _get_init_metadata_adata,
     _get_transform,
-    _transform_coordinates,
+    _subsample_points,
     get_duplicate_element_names,
     get_napari_version,
 )
@@ -41,6 +44,22 @@ if TYPE_CHECKING:
     from napari.utils.events import Event, EventedList
     from spatialdata import SpatialData
 
+# suffix that napari appends to the names of layers with a duplicate name
+_DUPLICATE_SUFFIX_RE = re.compile(r" \[\d+\]$")
+
+# number of computed points elements kept by the viewer, so that adding one of the last added points elements again,
+# e.g. in another coordinate system, does not compute it again
+_N_CACHED_POINTS = 4
+
+
+def _get_data_to_world(layer: Layer) -> NapariAffine:
+    """Get the transform from the data to the world coordinates of a layer, without the grid mode offset."""
+    # napari composes them in this order: affine * (rotate * shear * scale + translate)
+    data_to_physical = NapariAffine(
+        scale=layer.scale, translate=layer.translate, rotate=layer.rotate, shear=layer.shear
+    )
+    return layer.affine.compose(data_to_physical)
+
 
 class SpatialDataViewer(QObject):
     layer_saved = Signal(object)
@@ -52,6 +71,7 @@ class SpatialDataViewer(QObject):
         self.sdata = sdata
         self._model = DataModel()
         self._layer_event_caches: dict[str, list[dict[str, Any]]] = {}
+        self._points_cache: OrderedDict[int, tuple[weakref.ref[DaskDataFrame], int, pd.DataFrame, int]] = OrderedDict()
         self.viewer.bind_key("Shift-L", self._inherit_metadata, overwrite=True)
         self.viewer.bind_key("Shift-E", self._save_to_sdata, overwrite=True)
         self.viewer.layers.events.inserted.connect(self._on_layer_insert)
@@ -91,9 +111,9 @@ class SpatialDataViewer(QObject):
         layer = event.source
         sdata = layer.metadata.get("sdata")
 
-        pattern = r" \[\d+\]$"
-        duplicate_pattern_found = re.search(pattern, layer.name)
-        name_to_validate = re.sub(pattern, "", layer.name) if duplicate_pattern_found else layer.name
+        duplicate_pattern_found = _DUPLICATE_SUFFIX_RE.search(layer.name)
+        # the suffix is anchored to the end of the name, so the name before the match is the name without suffix
+        name_to_validate = layer.name[: duplicate_pattern_found.start()] if duplicate_pattern_found else layer.name
 
         # Ensures that the callback does not get called a second time when changing layer.name here.
         with layer.events.name.blocker(self._validate_name):
@@ -120,8 +140,10 @@ class SpatialDataViewer(QObject):
             napari_indices = sorted(event.data_indices, reverse=True)
             event.indices = tuple(event.source.metadata["indices"][i] for i in napari_indices)
             if event.action == "remove":
-                for i in napari_indices:
-                    del event.source.metadata["indices"][i]
+                # remove the indices of all removed shapes or points in one pass, instead of deleting them one by one
+                removed = set(napari_indices)
+                indices = event.source.metadata["indices"]
+                indices[:] = [index for i, index in enumerate(indices) if i not in removed]
         elif type(event.source) is Points and event.action == "change":
             logger.warning(
                 "Moving events of Points in napari can't be cached due to a bug in napari 0.4.18. This will"
@@ -182,8 +204,9 @@ class SpatialDataViewer(QObject):
 
         if len(layer_to_save.data) == 0:
             raise ValueError("Cannot export a points element with no points")
-        transformed_data = np.array([layer_to_save.data_to_world(xy) for xy in layer_to_save.data])
-        swap_data = np.fliplr(transformed_data)
+        # map all points to world coordinates at once, instead of calling data_to_world per point
+        transformed_data = np.atleast_2d(_get_data_to_world(layer_to_save)(layer_to_save.data))
+        swap_data = transformed_data[:, ::-1]
         # ignore z axis if present
         if swap_data.shape[1] == 3:
             swap_data = swap_data[:, :2]
@@ -251,16 +274,15 @@ class SpatialDataViewer(QObject):
         if len(layer_to_save.data) == 0:
             raise ValueError("Cannot export a shapes element with no shapes")
 
-        coords = [
-            np.array([layer_to_save.data_to_world(xy) for xy in shape._data])
-            for shape in layer_to_save._data_view.shapes
-        ]
+        # map the vertices of each shape to world coordinates at once, rather than calling data_to_world per vertex
+        to_world = _get_data_to_world(layer_to_save)
+        coords = [np.atleast_2d(to_world(shape._data)) for shape in layer_to_save._data_view.shapes]
 
         def _fix_coords(coords: ArrayLike) -> ArrayLike:
             remove_z = coords.shape[1] == 3
             first_index = 1 if remove_z else 0
-            coords = coords[:, first_index::]
-            return np.fliplr(coords)
+            # drop z and swap to x, y with a strided view, the vertices are only copied into the polygon
+            return coords[:, first_index:][:, ::-1]
 
         polygons: list[Polygon] = [Polygon(_fix_coords(p)) for p in coords]
         gdf = GeoDataFrame({"geometry": polygons})
@@ -340,14 +362,13 @@ class SpatialDataViewer(QObject):
     def _update_metadata(self, layer: Layer, model: DaskDataFrame | None) -> None:
         layer.metadata["name"] = layer.name
         layer.metadata["_n_indices"] = len(layer.data)
-        layer.metadata["indices"] = list(i for i in range(len(layer.data)))  # noqa: C400
+        layer.metadata["indices"] = list(range(len(layer.data)))
 
         sdata = layer.metadata["sdata"]
         adata, table_name, table_names = self._get_table_data(sdata, layer.metadata["name"])
         if adata is not None:
             layer.metadata["adata"] = adata
-            layer.metadata["region_key"] = adata.uns["spatialdata_attrs"]["region_key"] if table_name else None
-            layer.metadata["instance_key"] = adata.uns["spatialdata_attrs"]["instance_key"] if table_name else None
+            layer.metadata["region_key"], layer.metadata["instance_key"] = self._get_table_keys(sdata, table_name)
             layer.metadata["table_names"] = table_names if table_name else None
             layer.metadata["_columns_df"] = None
 
@@ -396,17 +417,18 @@ class SpatialDataViewer(QObject):
         ref_layer: Layer
             The layer containing the `SpatialData` object in the metadata to which the layers will be linked
         """
-        if not ref_layer.metadata.get("sdata"):
+        if not (sdata := ref_layer.metadata.get("sdata")):
             raise ValueError(f"{ref_layer} does not contain a SpatialData object in the metadata. Can't link layers.")
+        current_cs = ref_layer.metadata["_current_cs"]
 
         for layer in (
             layer
             for layer in layers
             if layer != ref_layer and isinstance(layer, Labels | Points | Shapes) and "sdata" not in layer.metadata
         ):
-            layer.metadata["sdata"] = ref_layer.metadata["sdata"]
-            layer.metadata["_current_cs"] = ref_layer.metadata["_current_cs"]
-            layer.metadata["_active_in_cs"] = {ref_layer.metadata["_current_cs"]}
+            layer.metadata["sdata"] = sdata
+            layer.metadata["_current_cs"] = current_cs
+            layer.metadata["_active_in_cs"] = {current_cs}
             layer.metadata["name"] = None
             layer.metadata["adata"] = None
             if isinstance(layer, Shapes | Labels):
@@ -419,14 +441,35 @@ class SpatialDataViewer(QObject):
 
         show_info(f"Layer(s) inherited info from {ref_layer}")
 
+    def _get_subsample_points(self, points: DaskDataFrame, size: int) -> tuple[pd.DataFrame, int]:
+        """Compute a points element with at most `size` rows, reusing it if it is one of the last computed ones."""
+        key = id(points)
+        cached = self._points_cache.get(key)
+        # the weak reference tells whether the id now belongs to another points element
+        if cached is None or cached[0]() is not points or cached[1] != size:
+            subsample_points, n_points = _subsample_points(points, size=size)
+            cached = (weakref.ref(points), size, subsample_points, n_points)
+            self._points_cache[key] = cached
+            if len(self._points_cache) > _N_CACHED_POINTS:
+                self._points_cache.popitem(last=False)
+        self._points_cache.move_to_end(key)
+        return cached[2], cached[3]
+
     def _get_table_data(
-        self, sdata: SpatialData, element_name: str
+        self, sdata: SpatialData, element_name: str, instances: pd.Index | None = None
     ) -> tuple[AnnData | None, str | None, list[str] | None]:
         table_names: list[str] = sorted(get_element_annotators(sdata, element_name))
         table_name = table_names[0] if len(table_names) > 0 else None
-        adata = _get_init_metadata_adata(sdata, table_name, element_name)
+        adata = _get_init_metadata_adata(sdata, table_name, element_name, instances=instances)
         return adata, table_name, table_names
 
+    @staticmethod
+    def _get_table_keys(sdata: SpatialData, table_name: str | None) -> tuple[str | None, str | None]:
+        if not table_name:
+            return None, None
+        _, region_key, instance_key = get_table_keys(sdata[table_name])
+        return region_key, instance_key
+
     def add_layer(self, layer: Layer) -> None:
         """
         Add a layer to the viewer.
@@ -464,10 +507,11 @@ class SpatialDataViewer(QObject):
         if multi:
             original_name = original_name[: original_name.rfind("_")]
 
-        affine = _get_transform(sdata.images[original_name], selected_cs)
-        rgb_image, rgb = _adjust_channels_order(element=sdata.images[original_name])
+        image = sdata.images[original_name]
+        affine = _get_transform(image, selected_cs)
+        rgb_image, rgb = _adjust_channels_order(element=image)
 
-        channels = ("RGB(A)",) if rgb else get_channels(sdata.images[original_name])
+        channels = ("RGB(A)",) if rgb else get_channels(image)
 
         adata = AnnData(shape=(0, len(channels)), var=pd.DataFrame(index=channels))
 
@@ -475,6 +519,7 @@ class SpatialDataViewer(QObject):
         return Image(
             rgb_image,
             rgb=rgb,
+            multiscale=isinstance(rgb_image, list),
             name=key,
             affine=affine,
             metadata={
@@ -509,18 +554,19 @@ class SpatialDataViewer(QObject):
             original_name = original_name[: original_name.rfind("_")]
 
         df = sdata.shapes[original_name]
-        affine = _get_transform(sdata.shapes[original_name], selected_cs)
+        affine = _get_transform(df, selected_cs)
 
-        xy = np.array([df.geometry.x, df.geometry.y]).T
-        yx = np.fliplr(xy)
+        # stack the vectorized coordinates in napari (y, x) order into a contiguous array, instead of flipping a copy
+        yx = np.column_stack((df.geometry.y.to_numpy(), df.geometry.x.to_numpy()))
         radii = df.radius.to_numpy()
 
         adata, table_name, table_names = self._get_table_data(sdata, original_name)
+        region_key, instance_key = self._get_table_keys(sdata, table_name)
         metadata = {
             "sdata": sdata,
             "adata": adata,
-            "region_key": sdata[table_name].uns["spatialdata_attrs"]["region_key"] if table_name else None,
-            "instance_key": sdata[table_name].uns["spatialdata_attrs"]["instance_key"] if table_name else None,
+            "region_key": region_key,
+            "instance_key": instance_key,
             "table_names": table_names if table_name else None,
             "name": original_name,
             "_active_in_cs": {selected_cs},
@@ -591,24 +637,25 @@ class SpatialDataViewer(QObject):
             original_name = original_name[: original_name.rfind("_")]
 
         df = sdata.shapes[original_name]
-        affine = _get_transform(sdata.shapes[original_name], selected_cs)
+        affine = _get_transform(df, selected_cs)
 
         # when mulitpolygons are present, we select the largest ones
-        if "MultiPolygon" in np.unique(df.geometry.type):
+        if np.any(shapely.get_type_id(df.geometry.values) == shapely.GeometryType.MULTIPOLYGON):
             logger.info("Multipolygons are present in the data. Only the largest polygon per cell is retained.")
             df = df.explode(index_parts=False)
-            df["area"] = df.area
-            df = df.sort_values(by="area", ascending=False)  # sort by area
-            df = df[~df.index.duplicated(keep="first")]  # only keep the largest area
-            df = df.sort_index()  # reset the index to the first order
+            # sort the parts by index and then by decreasing area, and keep the first (largest) part of each index
+            codes, _ = pd.factorize(df.index, sort=True)
+            order = np.lexsort((-shapely.area(df.geometry.values), codes))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = codes[order][1:] != codes[order][:-1]
+            df = df.iloc[order[first]]
 
         simplify = len(df) > config.POLYGON_THRESHOLD
-        polygons, indices = _get_polygons_properties(df, simplify)
-
         # this will only work for polygons and not for multipolygons
-        polygons = _transform_coordinates(polygons, f=lambda x: x[::-1])
+        polygons, indices = _get_polygons_properties(df, simplify)
 
         adata, table_name, table_names = self._get_table_data(sdata, original_name)
+        region_key, instance_key = self._get_table_keys(sdata, table_name)
 
         return Shapes(
             polygons,
@@ -619,8 +666,8 @@ class SpatialDataViewer(QObject):
             metadata={
                 "sdata": sdata,
                 "adata": adata,
-                "region_key": sdata[table_name].uns["spatialdata_attrs"]["region_key"] if table_name else None,
-                "instance_key": sdata[table_name].uns["spatialdata_attrs"]["instance_key"] if table_name else None,
+                "region_key": region_key,
+                "instance_key": instance_key,
                 "table_names": table_names if table_name else None,
                 "name": original_name,
                 "_active_in_cs": {selected_cs},
@@ -655,21 +702,25 @@ class SpatialDataViewer(QObject):
         if multi:
             original_name = original_name[: original_name.rfind("_")]
 
-        indices = get_element_instances(sdata.labels[original_name])
-        affine = _get_transform(sdata.labels[original_name], selected_cs)
-        rgb_labels, _ = _adjust_channels_order(element=sdata.labels[original_name])
+        labels = sdata.labels[original_name]
+        indices = get_element_instances(labels)
+        affine = _get_transform(labels, selected_cs)
+        rgb_labels, _ = _adjust_channels_order(element=labels)
 
-        adata, table_name, table_names = self._get_table_data(sdata, original_name)
+        # join the table with the instances computed above instead of computing them again from the labels
+        adata, table_name, table_names = self._get_table_data(sdata, original_name, instances=pd.Index(indices))
+        region_key, instance_key = self._get_table_keys(sdata, table_name)
 
         return Labels(
             rgb_labels,
+            multiscale=isinstance(rgb_labels, list),
             name=key,
             affine=affine,
             metadata={
                 "sdata": sdata,
                 "adata": adata,
-                "region_key": sdata[table_name].uns["spatialdata_attrs"]["region_key"] if table_name else None,
-                "instance_key": sdata[table_name].uns["spatialdata_attrs"]["instance_key"] if table_name else None,
+                "region_key": region_key,
+                "instance_key": instance_key,
                 "table_names": table_names if table_name else None,
                 "name": original_name,
                 "_active_in_cs": {selected_cs},
@@ -700,35 +751,29 @@ class SpatialDataViewer(QObject):
         if multi:
             original_name = original_name[: original_name.rfind("_")]
 
-        points = sdata.points[original_name].compute()
-        affine = _get_transform(sdata.points[original_name], selected_cs)
-        adata, table_name, table_names = self._get_table_data(sdata, original_name)
+        points_element = sdata.points[original_name]
+        affine = _get_transform(points_element, selected_cs)
 
-        if len(points) < config.POINT_THRESHOLD:
-            subsample = None
-        else:
+        subsample_points, n_points = self._get_subsample_points(points_element, size=config.POINT_THRESHOLD)
+        if len(subsample_points) < n_points:
             logger.info(
                 f"Subsampling points because the number of points exceeds the currently supported "
                 f"{config.POINT_THRESHOLD}. You can change this threshold with "
                 f"```from napari_spatialdata.constants import config\n"
                 f"config.POINT_THRESHOLD = <new_threshold>```"
             )
-            gen = np.random.default_rng()
-            subsample = np.sort(gen.choice(len(points), size=config.POINT_THRESHOLD, replace=False))  # same as indices
+        # join the table with the computed points, rather than with the full dask points element
+        adata, table_name, table_names = self._get_table_data(sdata, original_name, instances=subsample_points.index)
+        region_key, instance_key = self._get_table_keys(sdata, table_name)
 
-        subsample_points = points.iloc[subsample] if subsample is not None else points
-        if subsample is not None and table_name is not None:
-            _, adata = _left_join_spatialelement_table(
-                {"points": {original_name: subsample_points}}, sdata[table_name], match_rows="left"
-            )
-        xy = subsample_points[["y", "x"]].values
-        np.fliplr(xy)
+        # the rows are already subsampled, so only the shown points are converted to a napari (y, x) array
+        yx = subsample_points[["y", "x"]].to_numpy()
         # radii_size = _calc_default_radii(self.viewer, sdata, selected_cs)
         radii_size = 3
         version = get_napari_version()
         kwargs = {"edge_width": 0.0} if version <= packaging.version.parse("0.4.20") else {"border_width": 0.0}
         layer = Points(
-            xy,
+            yx,
             name=key,
             size=radii_size * 2,
             affine=affine,
@@ -736,12 +781,12 @@ class SpatialDataViewer(QObject):
                 "sdata": sdata,
                 "adata": adata,
                 "name": original_name,
-                "region_key": sdata[table_name].uns["spatialdata_attrs"]["region_key"] if table_name else None,
-                "instance_key": sdata[table_name].uns["spatialdata_attrs"]["instance_key"] if table_name else None,
+                "region_key": region_key,
+                "instance_key": instance_key,
                 "table_names": table_names if table_name else None,
                 "_active_in_cs": {selected_cs},
                 "_current_cs": selected_cs,
-                "_n_indices": len(points),
+                "_n_indices": n_points,
                 "indices": subsample_points.index.to_list(),
                 "_columns_df": (
                     subsample_excl_coords
@@ -794,7 +839,8 @@ class SpatialDataViewer(QObject):
                 element_name = metadata["name"]
                 element_data = sdata[element_name]
                 affine = _get_transform(element_data, coordinate_system)
-                if affine is not None:
+                # setting the affine updates the layer transforms and refreshes the layer, skip it if nothing changes
+                if affine is not None and not np.array_equal(affine, layer.affine.affine_matrix):
                     layer.affine = affine
                     if layer._type_string == "points":
                         self._adjust_radii_of_points_layer(layer, affine)
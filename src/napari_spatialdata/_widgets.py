@@ -18,8 +18,6 @@ from napari.utils import DirectLabelColormap
 from napari.viewer import Viewer
 from qtpy import QtCore, QtWidgets
 from qtpy.QtCore import Qt, Signal
-from scanpy.plotting._utils import _set_colors_for_categorical_obs
-from sklearn.preprocessing import MinMaxScaler
 from spatialdata._types import ArrayLike
 from superqt import QRangeSlider
 from vispy import scene
@@ -201,6 +199,9 @@ class AListWidget(ListWidget):
 
     @_get_points_properties.register(pd.Series)
     def _(self, vec: pd.Series, **kwargs: Any) -> dict[str, Any]:
+        # scanpy is only imported when the colors of a categorical are needed, since importing it is slow
+        from scanpy.plotting._utils import _set_colors_for_categorical_obs
+
         layer = kwargs.pop("layer", None)
         layer_metadata = self.model.layer.metadata if self.model.layer is not None else None
         if layer_metadata is None:
@@ -582,6 +583,9 @@ class RangeSliderWidget(QRangeSlider):
         minn, maxx = self._colorbar.getClim()
         minn = (minn - ominn) / delta
         maxx = (maxx - ominn) / delta
+        # sklearn is only imported once a vector is rescaled, since importing it is slow
+        from sklearn.preprocessing import MinMaxScaler
+
         scaler = MinMaxScaler(feature_range=(minn, maxx))
         return scaler.fit_transform(vec.reshape(-1, 1))
 
@@ -4,3 +4,5 @@ N_CIRCLES_WARNING_THRESHOLD = 250000
 N_SHAPES_WARNING_THRESHOLD = 10000
 POINT_SIZE_SCATTERPLOT_WIDGET = 6
 CIRCLES_AS_POINTS = True
+PSEUDO_SCATTER_THRESHOLD = 10000
+SCATTER_OUTLINE_THRESHOLD = 10000
@@ -5,7 +5,7 @@ from collections.abc import Callable, Generator, Iterable, Sequence
 from contextlib import contextmanager
 from functools import wraps
 from random import randint
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Literal
 
 import numpy as np
 import packaging.version
@@ -27,10 +27,11 @@ from pandas.core.dtypes.common import (
     is_string_dtype,
 )
 from qtpy.QtCore import QObject
+from qtpy.QtWidgets import QListWidgetItem
 from scipy.sparse import issparse, spmatrix
-from scipy.spatial import KDTree
+from scipy.spatial import cKDTree
 from spatialdata import SpatialData, get_extent, join_spatialelement_table
-from spatialdata.models import SpatialElement, get_axes_names
+from spatialdata.models import SpatialElement, get_axes_names, get_table_keys
 from spatialdata.transformations import get_transformation
 from xarray import DataArray, DataTree
 
@@ -42,7 +43,6 @@ from napari_spatialdata.utils._categoricals_utils import (
 if TYPE_CHECKING:
     from napari import Viewer
     from napari.utils.events import EventedList
-    from qtpy.QtWidgets import QListWidgetItem
 
     from napari_spatialdata._sdata_widgets import CoordinateSystemWidget, ElementWidget
 
@@ -144,7 +144,12 @@ def _get_categorical(
                 raise ValueError(f"`{colordict[cat]}` is not an acceptable color.")
 
     logger.debug(f"KEY: {key}")
-    return np.array([col_dict[v] for v in categorical])
+    # look up the colors of the categories that occur once and gather them by the category codes
+    codes = np.asarray(categorical.cat.codes)
+    used_codes, inverse = np.unique(codes, return_inverse=True)
+    categories = categorical.cat.categories
+    colors = np.array([col_dict[categories[code] if code >= 0 else np.nan] for code in used_codes])
+    return colors[inverse.ravel()]
 
 
 def _position_cluster_labels(coords: ArrayLike, clusters: pd.Series) -> dict[str, ArrayLike]:
@@ -153,9 +158,10 @@ def _position_cluster_labels(coords: ArrayLike, clusters: pd.Series) -> dict[str
     coords = coords[:, 1:]
     df = pd.DataFrame(coords)
     df["clusters"] = clusters.values
-    df = df.groupby("clusters", observed=True)[[0, 1]].apply(lambda g: list(np.median(g.values, axis=0)))
-    df = pd.DataFrame(list(df), index=df.index).dropna()
-    kdtree = KDTree(coords)
+    # the medians of all clusters are computed at once, rather than with a python callback per cluster
+    df = df.groupby("clusters", observed=True)[[0, 1]].median().dropna()
+    # the tree is only queried once per cluster, so it is built without the balancing and compacting of the nodes
+    kdtree = cKDTree(coords, balanced_tree=False, compact_nodes=False)
     clusters = np.full(len(coords), fill_value="", dtype=object)
     # index consists of the categories that need not be string
     clusters[kdtree.query(df.values)[1]] = df.index.astype(str)
@@ -194,29 +200,39 @@ def _get_transform(element: SpatialElement, coordinate_system_name: str | None =
 
 
 @njit(cache=True, fastmath=True)
-def _point_inside_triangles(triangles: ArrayLike) -> np.bool_:
-    # modified from napari
-    AB = triangles[:, 1, :] - triangles[:, 0, :]
-    AC = triangles[:, 2, :] - triangles[:, 0, :]
-    BC = triangles[:, 2, :] - triangles[:, 1, :]
-
-    s_AB = -AB[:, 0] * triangles[:, 0, 1] + AB[:, 1] * triangles[:, 0, 0] >= 0
-    s_AC = -AC[:, 0] * triangles[:, 0, 1] + AC[:, 1] * triangles[:, 0, 0] >= 0
-    s_BC = -BC[:, 0] * triangles[:, 1, 1] + BC[:, 1] * triangles[:, 1, 0] >= 0
-
-    return np.any((s_AB != s_AC) & (s_AB == s_BC))
-
-
-@njit(parallel=True)
+def _point_inside_triangles(triangles: ArrayLike, bounds: ArrayLike, px: float, py: float) -> bool:
+    # modified from napari, the vertices are taken relative to the point one triangle at a time, so no temporary array
+    # is allocated and the triangles after the first one containing the point are not tested
+    for j in range(triangles.shape[0]):
+        # a point outside the bounding box of a triangle is outside the triangle
+        if px < bounds[j, 0] or px > bounds[j, 1] or py < bounds[j, 2] or py > bounds[j, 3]:
+            continue
+        ax, ay = triangles[j, 0, 0] - px, triangles[j, 0, 1] - py
+        bx, by = triangles[j, 1, 0] - px, triangles[j, 1, 1] - py
+        cx, cy = triangles[j, 2, 0] - px, triangles[j, 2, 1] - py
+
+        s_AB = -(bx - ax) * ay + (by - ay) * ax >= 0
+        s_AC = -(cx - ax) * ay + (cy - ay) * ax >= 0
+        s_BC = -(cx - bx) * by + (cy - by) * bx >= 0
+
+        if s_AB != s_AC and s_AB == s_BC:
+            return True
+    return False
+
+
+@njit(cache=True, parallel=True, fastmath=True)
 def _points_inside_triangles(points: ArrayLike, triangles: ArrayLike) -> ArrayLike:
-    out = np.empty(
-        len(
-            points,
-        ),
-        dtype=np.bool_,
-    )
+    # the bounding boxes (xmin, xmax, ymin, ymax) of the triangles are computed once for all points
+    bounds = np.empty((triangles.shape[0], 4))
+    for j in range(triangles.shape[0]):
+        bounds[j, 0] = min(triangles[j, 0, 0], triangles[j, 1, 0], triangles[j, 2, 0])
+        bounds[j, 1] = max(triangles[j, 0, 0], triangles[j, 1, 0], triangles[j, 2, 0])
+        bounds[j, 2] = min(triangles[j, 0, 1], triangles[j, 1, 1], triangles[j, 2, 1])
+        bounds[j, 3] = max(triangles[j, 0, 1], triangles[j, 1, 1], triangles[j, 2, 1])
+
+    out = np.empty(len(points), dtype=np.bool_)
     for i in prange(len(out)):
-        out[i] = _point_inside_triangles(triangles - points[i])
+        out[i] = _point_inside_triangles(triangles, bounds, points[i, 0], points[i, 1])
 
     return out
 
@@ -355,34 +371,145 @@ def get_elements_meta_mapping(
     """
     elements = {}
     name_to_add = None
+    coordinate_systems: list[str]
+    if isinstance(coordinate_system_name, str):
+        coordinate_systems = [coordinate_system_name]
+    elif isinstance(coordinate_system_name, QListWidgetItem):
+        coordinate_systems = [coordinate_system_name.text()]
+    else:
+        coordinate_systems = list(coordinate_system_name)
+    duplicates = set(duplicate_element_names)
     for index, sdata in enumerate(sdatas):
-        for element_type, element_name, _ in sdata.filter_by_coordinate_system(coordinate_system_name)._gen_elements():
+        # Filter in a single pass over the elements instead of materializing a filtered SpatialData object, which
+        # would also filter all the tables.
+        for element_type, element_name, element in sdata._gen_elements():
+            transformations = get_transformation(element, get_all=True)
+            assert isinstance(transformations, dict)
+            if not any(cs in transformations for cs in coordinate_systems):
+                continue
             elements_metadata = {
                 "element_type": element_type,
                 "sdata_index": index,
                 "original_name": element_name,
             }
-            name = element_name if element_name not in duplicate_element_names else element_name + f"_{index}"
+            name = element_name if element_name not in duplicates else element_name + f"_{index}"
             if key and element_name == key:
                 name_to_add = name
             elements[name] = elements_metadata
     return elements, name_to_add
 
 
-def _get_init_metadata_adata(sdata: SpatialData, table_name: str | None, element_name: str) -> None | AnnData:
+def _get_region_positions(table: AnnData, region: str) -> ArrayLike:
+    """
+    Get the integer row positions of the table annotating `region`.
+
+    The positions are computed from the integer codes of the categorical region column, so the region names of all
+    rows are not compared as strings. They are computed on each call and not cached, since the region column of the
+    table can be written in place without any notification.
+
+    Parameters
+    ----------
+    table
+        The table annotating one or more SpatialElements.
+    region
+        The name of the region.
+
+    Returns
+    -------
+    The integer positions of the rows annotating `region`.
+    """
+    _, region_key, _ = get_table_keys(table)
+    region_column = table.obs[region_key]
+    if not isinstance(region_column.dtype, CategoricalDtype):
+        return np.flatnonzero(region_column.to_numpy() == region)
+    if region not in region_column.cat.categories:
+        return np.empty(0, dtype=int)
+    return np.flatnonzero(region_column.cat.codes.to_numpy() == region_column.cat.categories.get_loc(region))
+
+
+def _get_region_table(table: AnnData, region: str) -> AnnData:
+    """Get a view of the table containing only the rows annotating `region`."""
+    return table[_get_region_positions(table, region)]
+
+
+def _join_region_instances(
+    table: AnnData, instances: pd.Index, match_rows: Literal["no", "left", "right"] = "no"
+) -> AnnData:
+    """
+    Join the rows of a table annotating one region with the given instances of that region.
+
+    The rows whose instance id is in `instances` are kept. If `match_rows` is ``'left'`` they are in the order of
+    `instances`, otherwise in the order of the table. As for :func:`spatialdata.join_spatialelement_table`, the
+    categories of the categorical obs columns are kept.
+    """
+    _, _, instance_key = get_table_keys(table)
+    table_instances = pd.Index(table.obs[instance_key])
+    if match_rows == "left":
+        positions = table_instances.get_indexer_for(instances)
+        positions = positions[positions != -1]
+    else:
+        positions = np.flatnonzero(table_instances.isin(instances))
+    joined_table = table[positions].copy()
+
+    obs = pd.DataFrame(joined_table.obs)
+    for column in obs.columns:
+        if isinstance(obs[column].dtype, CategoricalDtype):
+            obs[column] = obs[column].cat.set_categories(table.obs[column].cat.categories)
+    joined_table.obs = obs
+    return joined_table
+
+
+def _join_region_table(
+    sdata: SpatialData,
+    table_name: str,
+    element_name: str,
+    how: Literal["left", "inner"] = "left",
+    match_rows: Literal["no", "left", "right"] = "no",
+    instances: pd.Index | None = None,
+) -> AnnData | None:
+    """
+    Join a SpatialElement with the rows of a table annotating it.
+
+    This is equivalent to :func:`spatialdata.join_spatialelement_table`, but the table is first subset to the rows
+    annotating the element by their integer positions, so the join does not group the rows of other regions.
+    If `instances` is given, for example the indices of the computed subset of a points element or the label values
+    of a labels element, the table is joined with these instances instead of with the element stored in `sdata`
+    under `element_name`. For a left or inner join of a table with a points or labels element only the instances of
+    the element are used, so the full dask dataframe or the labels do not have to be computed again.
+    """
+    table = _get_region_table(sdata[table_name], element_name)
+    if instances is not None:
+        return _join_region_instances(table, instances, match_rows)
+    _, adata = join_spatialelement_table(
+        spatial_element_names=[element_name],
+        spatial_elements=[sdata[element_name]],
+        table=table,
+        how=how,
+        match_rows=match_rows,
+    )
+    return adata
+
+
+def _get_init_metadata_adata(
+    sdata: SpatialData,
+    table_name: str | None,
+    element_name: str,
+    instances: pd.Index | None = None,
+) -> None | AnnData:
     """
     Retrieve AnnData to be used in layer metadata.
 
     Get the AnnData table in the SpatialData object based on table_name and return a table with only those rows that
-    annotate the element. For this a left join is performed.
+    annotate the element. For this a left join is performed on the rows of the table annotating the element, or
+    annotating `instances` of the element if given.
     """
     if not table_name:
         return None
-    _, adata = join_spatialelement_table(
-        sdata=sdata, spatial_element_names=element_name, table_name=table_name, how="left", match_rows="left"
-    )
+    if len(_get_region_positions(sdata[table_name], element_name)) == 0:
+        return None
 
-    if adata.shape[0] == 0:
+    adata = _join_region_table(sdata, table_name, element_name, how="left", match_rows="left", instances=instances)
+    if adata is None or adata.shape[0] == 0:
         return None
     return adata
 
@@ -454,6 +581,19 @@ def generate_random_color_hex() -> str:
     return f"#{randint(0, 255):02x}{randint(0, 255):02x}{randint(0, 255):02x}ff"
 
 
+@njit(cache=True, parallel=True, fastmath=True)
+def _ellipses_from_circles(yx: ArrayLike, radii: ArrayLike) -> ArrayLike:
+    out = np.empty((len(yx), 4, 2), dtype=np.float32)
+    for i in prange(len(yx)):
+        y, x, r = yx[i, 0], yx[i, 1], radii[i]
+        out[i, 0, 0], out[i, 0, 1] = y - r, x - r
+        out[i, 1, 0], out[i, 1, 1] = y + r, x - r
+        out[i, 2, 0], out[i, 2, 1] = y + r, x + r
+        out[i, 3, 0], out[i, 3, 1] = y - r, x + r
+
+    return out
+
+
 def _get_ellipses_from_circles(yx: ArrayLike, radii: ArrayLike) -> ArrayLike:
     """Convert circles to ellipses.
 
@@ -467,21 +607,53 @@ def _get_ellipses_from_circles(yx: ArrayLike, radii: ArrayLike) -> ArrayLike:
     Returns
     -------
     ArrayLike
-        Ellipses.
+        Ellipses as a float32 array of shape (n, 4, 2), the dtype in which napari stores the shape vertices.
     """
     ndim = yx.shape[1]
     assert ndim == 2
-    r = np.stack([radii] * ndim, axis=1)
-    lower_left = yx - r
-    upper_right = yx + r
-    r[:, 0] = -r[:, 0]
-    lower_right = yx - r
-    upper_left = yx + r
-    ellipses = np.stack([lower_left, lower_right, upper_right, upper_left], axis=1)
+    ellipses = _ellipses_from_circles(
+        np.ascontiguousarray(yx, dtype=np.float64), np.ascontiguousarray(radii, dtype=np.float64)
+    )
     assert isinstance(ellipses, np.ndarray)
     return ellipses
 
 
+def _subsample_points(points: DaskDataFrame, size: int) -> tuple[pd.DataFrame, int]:
+    """Compute a points element, randomly subsampling it when it has more than `size` rows.
+
+    Parameters
+    ----------
+    points
+        The dask dataframe of the points element.
+    size
+        The maximum number of points to compute.
+
+    Returns
+    -------
+    tuple[pd.DataFrame, int]
+        The computed, possibly subsampled, points in their original order and the total number of points.
+    """
+    # only the index is needed to count the points per partition
+    partition_lengths = points.index.map_partitions(len).compute().to_numpy()
+    n_points = int(partition_lengths.sum())
+    if n_points <= size:
+        return points.compute(), n_points
+
+    gen = np.random.default_rng()
+    # the positions are sorted below, so the selected positions need not be shuffled
+    subsample = np.sort(gen.choice(n_points, size=size, replace=False, shuffle=False))
+    offsets = np.concatenate(([0], np.cumsum(partition_lengths)))
+    bounds = np.searchsorted(subsample, offsets)
+
+    def _take(partition: pd.DataFrame, partition_info: dict[str, Any] | None = None) -> pd.DataFrame:
+        assert partition_info is not None
+        i = partition_info["number"]
+        return partition.iloc[subsample[bounds[i] : bounds[i + 1]] - offsets[i]]
+
+    # select the rows within each partition, so that only the subsampled points are materialized
+    return points.map_partitions(_take, meta=points._meta).compute(), n_points
+
+
 def get_napari_version() -> packaging.version.Version:
     return packaging.version.parse(__version__)
 
@@ -1,18 +1,29 @@
+import numpy as np
+import shapely
 from geopandas import GeoDataFrame
+from spatialdata._types import ArrayLike
 
 
-def _get_polygons_properties(df: GeoDataFrame, simplify: bool) -> tuple[list[list[tuple[float, float]]], list[int]]:
-    indices = []
-    polygons = []
+def _get_polygons_properties(df: GeoDataFrame, simplify: bool) -> tuple[list[ArrayLike] | ArrayLike, list[int]]:
+    """
+    Get the float32 exterior coordinates of the polygons in napari (y, x) order, together with the polygon indices.
 
+    The coordinates of all polygons are extracted at once and split per polygon, instead of iterating the geometries.
+    If all polygons have the same number of vertices, they are returned as a single array of shape (n, k, 2).
+    """
+    exteriors = shapely.get_exterior_ring(df.geometry.values)
     if simplify:
-        for i in range(0, len(df)):
-            indices.append(df.iloc[i].name)
-            # This can be removed once napari is sped up in the plotting. It changes the shapes only very slightly
-            polygons.append(list(df.geometry.iloc[i].exterior.simplify(tolerance=2).coords))
-    else:
-        for i in range(0, len(df)):
-            indices.append(df.iloc[i].name)
-            polygons.append(list(df.geometry.iloc[i].exterior.coords))
+        # This can be removed once napari is sped up in the plotting. It changes the shapes only very slightly
+        exteriors = shapely.simplify(exteriors, tolerance=2)
 
-    return polygons, indices
+    coords, index = shapely.get_coordinates(exteriors, return_index=True)
+    # napari stores the shape vertices as float32, converting all of them at once saves a copy per polygon
+    coords = coords[:, ::-1].astype(np.float32)
+    # count the coordinates per polygon so that polygons without coordinates still get an (empty) entry
+    counts = np.bincount(index, minlength=len(df))
+    if len(counts) and counts.min() == counts.max():
+        # polygons with the same number of vertices are passed as a single (n, k, 2) array
+        return coords.reshape(len(df), counts[0], 2), df.index.tolist()
+    polygons = np.split(coords, np.cumsum(counts)[:-1])
+
+    return polygons, df.index.tolist()
@@ -15,13 +15,15 @@ import pytest
 from anndata import AnnData
 from loguru import logger
 from matplotlib.testing.compare import compare_images
+from napari.utils.events import EventedList
 from scipy import ndimage as ndi
 from skimage import data
-from spatialdata import SpatialData
+from spatialdata import SpatialData, deepcopy
 from spatialdata._types import ArrayLike
 from spatialdata.datasets import blobs
 from spatialdata.models import TableModel
 
+from napari_spatialdata._sdata_widgets import SdataWidget
 from napari_spatialdata.utils._test_utils import save_image, take_screenshot
 
 HERE: Path = Path(__file__).parent
@@ -86,11 +88,17 @@ def annotation_values(adata_labels):
     return rng.integers(0, 10, size=len(adata_labels.obs))
 
 
-@pytest.fixture
-def blobs_extra_cs() -> SpatialData:
+@pytest.fixture(scope="session")
+def _blobs_extra_cs() -> SpatialData:
     return blobs(extra_coord_system="space")
 
 
+@pytest.fixture
+def blobs_extra_cs(_blobs_extra_cs: SpatialData) -> SpatialData:
+    # copying the dataset generated once per session is cheaper than generating it for every test
+    return deepcopy(_blobs_extra_cs)
+
+
 @pytest.fixture
 def adata_shapes() -> AnnData:
     n_obs_shapes = 100
@@ -126,11 +134,24 @@ def adata_shapes() -> AnnData:
     )
 
 
-@pytest.fixture()
-def sdata_blobs() -> SpatialData:
+@pytest.fixture(scope="session")
+def _sdata_blobs() -> SpatialData:
     return blobs()
 
 
+@pytest.fixture()
+def sdata_blobs(_sdata_blobs: SpatialData) -> SpatialData:
+    return deepcopy(_sdata_blobs)
+
+
+@pytest.fixture
+def sdata_widget(make_napari_viewer: Any, sdata_blobs: SpatialData) -> SdataWidget:
+    viewer = make_napari_viewer()
+    widget = SdataWidget(viewer, EventedList([sdata_blobs]))
+    viewer.window.add_dock_widget(widget, name="SpatialData")
+    return widget
+
+
 @pytest.fixture
 def image():
     _, image = _get_blobs_galaxy()
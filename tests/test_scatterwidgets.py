@@ -2,7 +2,7 @@ import numpy as np
 import pyqtgraph as pg
 import pytest
 from pyqtgraph.Qt import QtCore, QtGui, QtWidgets
-from shapely.geometry import Polygon
+from shapely.geometry import Point, Polygon
 
 from napari_spatialdata._model import DataModel
 from napari_spatialdata._scatterwidgets import PlotWidget
@@ -71,6 +71,71 @@ def test_plot_data_discrete(plot_widget, prepare_discrete_test_data):
     assert plot_widget.discrete_color_widget is not None
 
 
+def test_discrete_brushes(plot_widget, prepare_discrete_test_data):
+    """Test that discrete brushes follow the palette and are shared per category."""
+    x_data, y_data, color_data, x_label, y_label, color_label = prepare_discrete_test_data
+    color_data = {"vec": np.arange(DATA_LEN) % 3, "labels": ["a", "b", "c"]}
+    plot_widget._onClick(x_data, y_data, color_data, x_label, y_label, color_label)
+
+    brushes = plot_widget.brushes
+    assert len(brushes) == DATA_LEN
+    assert len({id(brush) for brush in brushes}) == 3
+    assert plot_widget.brush_codes.dtype == np.uint8
+    palette = plot_widget.discrete_color_widget.palette
+    for brush, category in zip(brushes, color_data["vec"], strict=True):
+        assert brush.color() == pg.mkBrush(*palette.map(category + 1) * 255).color()
+
+
+def test_continuous_brushes(plot_widget, prepare_continuous_test_data):
+    """Test that continuous brushes are quantized to the uint8 lookup table of the color map."""
+    plot_widget._onClick(*prepare_continuous_test_data)
+
+    brushes = plot_widget.brushes
+    assert len(brushes) == DATA_LEN
+    assert len({id(brush) for brush in brushes}) <= 256
+
+    level_min, level_max = plot_widget.lut.getLevels()
+    data = (np.clip(plot_widget.color_vec, level_min, level_max) - level_min) / (level_max - level_min)
+    expected = plot_widget.lut.gradient.colorMap().map(data)
+    colors = np.array([brush.color().getRgb() for brush in brushes])
+    assert np.abs(colors.astype(int) - expected.astype(int)).max() <= 2
+
+
+def test_color_change_reuses_scatter(plot_widget, prepare_continuous_test_data, prepare_discrete_test_data):
+    """Test that changing only the colors keeps the plotted scatter item."""
+    plot_widget._onClick(*prepare_continuous_test_data)
+    scatter = plot_widget.scatter
+
+    x_data, y_data, _, x_label, y_label, _ = prepare_continuous_test_data
+    _, _, color_data, _, _, color_label = prepare_discrete_test_data
+    plot_widget._onClick(x_data, y_data, color_data, x_label, y_label, color_label)
+    assert plot_widget.scatter is scatter
+    assert scatter.opts["symbolBrush"] is plot_widget.brushes
+    assert scatter.scatter.data["brush"][0] is plot_widget.brushes[0]
+
+    plot_widget.lut = None
+    plot_widget.on_gradient_changed()
+    assert plot_widget.scatter is scatter
+
+
+def test_palette_change_patches_brushes(plot_widget, prepare_discrete_test_data):
+    """Test that changing the color of one category only restyles the points of that category."""
+    x_data, y_data, color_data, x_label, y_label, color_label = prepare_discrete_test_data
+    color_data = {"vec": np.arange(DATA_LEN) % 3, "labels": ["a", "b", "c"]}
+    plot_widget._onClick(x_data, y_data, color_data, x_label, y_label, color_label)
+    scatter = plot_widget.scatter
+    previous_brushes = scatter.scatter.data["brush"].copy()
+
+    plot_widget.discrete_color_widget.color_buttons["b"].setColor((255, 0, 0, 255))
+
+    assert plot_widget.scatter is scatter
+    brushes = scatter.scatter.data["brush"]
+    changed = color_data["vec"] == 1
+    assert all(brush.color() == QtGui.QColor(255, 0, 0, 255) for brush in brushes[changed])
+    assert all(brush is previous for brush, previous in zip(brushes[~changed], previous_brushes[~changed], strict=True))
+    assert all(brush.color() == current.color() for brush, current in zip(brushes, plot_widget.brushes, strict=True))
+
+
 def test_plot_data_widget_change(plot_widget, prepare_continuous_test_data, prepare_discrete_test_data):
     """Test building color widgets upon changing data type."""
     plot_widget._onClick(*prepare_discrete_test_data)
@@ -114,6 +179,29 @@ def test_plot_pseudo_histogram(plot_widget, prepare_continuous_test_data):
     assert plot_widget.scatter is not None
 
 
+def test_plot_pseudo_histogram_binned(plot_widget, prepare_continuous_test_data, monkeypatch):
+    """Test that the pseudo scatter positions are binned for large data."""
+    monkeypatch.setattr("napari_spatialdata.constants.config.PSEUDO_SCATTER_THRESHOLD", DATA_LEN // 2)
+    x_data, y_data, color_data, x_label, y_label, color_label = prepare_continuous_test_data
+    plot_widget._onClick(x_data, None, color_data, x_label, "None: None", color_label)
+
+    positions = plot_widget.scatter.yData
+    assert len(positions) == DATA_LEN
+    # with binning, the positions are the counts of the points within each bin
+    np.testing.assert_array_equal(positions, positions.astype(int))
+    assert positions.min() == 0
+
+
+def test_plot_large_data_without_outlines(plot_widget, prepare_continuous_test_data, monkeypatch):
+    """Test that the points are plotted without outlines for large data."""
+    plot_widget._onClick(*prepare_continuous_test_data)
+    assert plot_widget.scatter.opts["symbolPen"] is plot_widget.symbolPen
+
+    monkeypatch.setattr("napari_spatialdata.constants.config.SCATTER_OUTLINE_THRESHOLD", DATA_LEN // 2)
+    plot_widget.plot()
+    assert plot_widget.scatter.opts["symbolPen"] is None
+
+
 def test_hover_highlight_cont(plot_widget, prepare_continuous_test_data):
     """Test hover highlight functionality."""
     x_data, y_data, color_data, x_label, y_label, color_label = prepare_continuous_test_data
@@ -143,6 +231,20 @@ def test_clear_hover_highlight(plot_widget, prepare_discrete_test_data):
     assert plot_widget.hovered_point.data.size == 0
 
 
+def test_hover_event_throttled(plot_widget, qtbot, prepare_discrete_test_data):
+    """Test that consecutive hover events are coalesced into one highlight update at the latest position."""
+    x_data, y_data, color_data, x_label, y_label, color_label = prepare_discrete_test_data
+    plot_widget._onClick(x_data, y_data, color_data, x_label, y_label, color_label)
+
+    plot_widget.on_hover_event(x_data["vec"][1], y_data["vec"][1])
+    plot_widget.on_hover_event(x_data["vec"][0], y_data["vec"][0])
+    assert plot_widget.hovered_point.data.size == 0
+
+    qtbot.waitUntil(lambda: plot_widget.hovered_point.data.size > 0)
+    assert plot_widget.hovered_point.data[0][0] == x_data["vec"][0]
+    assert plot_widget.hovered_point.data[0][1] == y_data["vec"][0]
+
+
 def test_toggle_drawing_mode(plot_widget):
     """Test toggling of drawing mode."""
     plot_widget.toggle_drawing_mode()
@@ -235,6 +337,11 @@ def test_roi_to_polygon(plot_widget):
     assert isinstance(polygon_list[0], Polygon)
     assert coordinates_are_equal(list(polygon_list[0].exterior.coords)[:-1], vertices)
 
+    # the vertices of a moved ROI are shifted by its position
+    roi.setPos([2, 3])
+    polygon_list = plot_widget.rois_to_polygons()
+    assert coordinates_are_equal(list(polygon_list[0].exterior.coords)[:-1], [[x + 2, y + 3] for x, y in vertices])
+
 
 def test_roi_to_polygon_rect(plot_widget):
     """Test conversion of ROI to Polygon."""
@@ -367,6 +474,27 @@ def test_selection_from_roi(plot_widget, prepare_discrete_test_data):
     assert np.sum(boolean_vector) == DATA_LEN
 
 
+def test_partial_selection_from_rois(plot_widget, prepare_discrete_test_data):
+    """Test selection of points from multiple partially overlapping rois."""
+    plot_widget._onClick(*prepare_discrete_test_data)
+    rect_roi = pg.RectROI([0, 0], [0.5, 0.5])
+    poly_roi = pg.PolyLineROI([[0.25, 0.25], [1, 0.25], [1, 1]], closed=True)
+    plot_widget.roi_list = [rect_roi, poly_roi]
+
+    boolean_vector = plot_widget.get_selection()
+
+    polygons = plot_widget.rois_to_polygons()
+    x_vec, y_vec = prepare_discrete_test_data[0]["vec"], prepare_discrete_test_data[1]["vec"]
+    expected = [any(polygon.contains(Point(x, y)) for polygon in polygons) for x, y in zip(x_vec, y_vec, strict=True)]
+    assert boolean_vector.dtype == bool
+    assert 0 < np.sum(boolean_vector) < DATA_LEN
+    np.testing.assert_array_equal(boolean_vector, expected)
+
+    # without the k-d tree, the candidates are found with the bounding boxes of the rois
+    plot_widget.kd_tree = None
+    np.testing.assert_array_equal(plot_widget.get_selection(), expected)
+
+
 def test_auto_range_discrete(plot_widget, prepare_discrete_test_data):
     """Test auto range for discrete data."""
     plot_widget._onClick(*prepare_discrete_test_data)
@@ -1,5 +1,6 @@
 import logging
 from typing import Any
+from unittest.mock import patch
 
 import numpy as np
 import pandas as pd
@@ -24,6 +25,7 @@ from napari_spatialdata import QtAdataViewWidget
 from napari_spatialdata._sdata_widgets import CoordinateSystemWidget, ElementWidget, SdataWidget
 from napari_spatialdata.constants import config
 from napari_spatialdata.utils._test_utils import click_list_widget_item, get_center_pos_listitem
+from napari_spatialdata.utils._utils import _join_region_table
 
 RNG = np.random.default_rng(seed=0)
 
@@ -45,6 +47,28 @@ def test_elementwidget(make_napari_viewer: Any, blobs_extra_cs: SpatialData):
         assert widget._elements[name]["element_type"] == "shapes"
 
 
+def test_elementwidget_large_shapes_warning(make_napari_viewer: Any, blobs_extra_cs: SpatialData, monkeypatch):
+    _ = make_napari_viewer()
+    monkeypatch.setattr("napari_spatialdata._sdata_widgets.N_CIRCLES_WARNING_THRESHOLD", 0)
+    monkeypatch.setattr("napari_spatialdata._sdata_widgets.N_SHAPES_WARNING_THRESHOLD", 0)
+    widget = ElementWidget(EventedList([blobs_extra_cs]))
+    widget._onItemChange("global")
+    items = {widget.item(x).text(): widget.item(x) for x in range(widget.count())}
+    assert widget.count() == len(items) == len(widget._elements)
+    assert "circles" in items["blobs_circles"].toolTip()
+    assert "shapes" in items["blobs_polygons"].toolTip()
+    assert not items["blobs_image"].toolTip()
+
+
+def test_elementwidget_updates_enabled_after_error(make_napari_viewer: Any, blobs_extra_cs: SpatialData):
+    _ = make_napari_viewer()
+    widget = ElementWidget(EventedList([blobs_extra_cs]))
+    elements = {"missing": {"element_type": "shapes", "sdata_index": 0, "original_name": "missing"}}
+    with pytest.raises(KeyError):
+        widget._set_element_widget_items(elements)
+    assert widget.updatesEnabled()
+
+
 def test_coordinatewidget(make_napari_viewer: Any, blobs_extra_cs: SpatialData):
     _ = make_napari_viewer()
     widget = CoordinateSystemWidget(EventedList([blobs_extra_cs]))
@@ -69,6 +93,8 @@ def test_sdatawidget_images(make_napari_viewer: Any, blobs_extra_cs: SpatialData
     widget._onClick("image")
 
     assert len(widget.viewer_model.viewer.layers) == 2
+    assert widget.viewer_model.viewer.layers[1].multiscale
+    assert len(widget.viewer_model.viewer.layers[1].data) == len(blobs_extra_cs.images["image"])
     assert (widget.viewer_model.viewer.layers[0].data == widget.viewer_model.viewer.layers[1].data._data[0]).all()
     del blobs_extra_cs.images["image"]
 
@@ -202,6 +228,25 @@ def test_layer_visibility(qtbot, make_napari_viewer: Any, blobs_extra_cs: Spatia
     assert points.metadata["_active_in_cs"] == {"global", "space", "other"}
 
 
+def test_layer_visibility_not_reset(qtbot, make_napari_viewer: Any, blobs_extra_cs: SpatialData):
+    viewer = make_napari_viewer()
+    widget = SdataWidget(viewer, EventedList([blobs_extra_cs]))
+
+    center_pos = get_center_pos_listitem(widget.coordinate_system_widget, "global")
+    click_list_widget_item(qtbot, widget.coordinate_system_widget, center_pos, "currentItemChanged")
+    widget._onClick(list(blobs_extra_cs.labels.keys())[0])
+    labels = viewer.layers[0]
+
+    # the layer stays visible in `space`, so its visibility is not set (and the layer not refreshed) again
+    with labels.events.visible.blocker() as blocker:
+        center_pos = get_center_pos_listitem(widget.coordinate_system_widget, "space")
+        click_list_widget_item(qtbot, widget.coordinate_system_widget, center_pos, "currentItemChanged")
+    assert blocker.count == 0
+    assert labels.visible
+    assert labels.metadata["_active_in_cs"] == {"global", "space"}
+    assert labels.metadata["_current_cs"] == "space"
+
+
 def test_multiple_sdata(qtbot, make_napari_viewer: Any, blobs_extra_cs: SpatialData):
     # Create additional sdata with one extra element that is unique
     sdata_mock = blobs(extra_coord_system="test")
@@ -346,3 +391,70 @@ def test_partial_table_matching_with_arbitrary_ordering(qtbot, make_napari_viewe
 
     center_pos = get_center_pos_listitem(view_widget.obs_widget, "instance_id")
     click_list_widget_item(qtbot, view_widget.obs_widget, center_pos, "itemDoubleClicked", click="double")
+
+
+def test_update_adata_of_subsampled_points(monkeypatch, make_napari_viewer: Any, blobs_extra_cs: SpatialData):
+    monkeypatch.setattr(config, "POINT_THRESHOLD", 400)
+    blobs_extra_cs.points["many_points"] = PointsModel.parse(
+        from_dask_array(randint(0, 10, [800, 2], dtype=int64), columns=["x", "y"])
+    )
+    adata = AnnData(
+        X=RNG.normal(size=(800, 1)),
+        obs=pd.DataFrame({"instance_id": list(range(800)), "region": ["many_points"] * 800}),
+    )
+    blobs_extra_cs["many_points_table"] = TableModel.parse(
+        adata, region_key="region", region="many_points", instance_key="instance_id"
+    )
+
+    viewer = make_napari_viewer()
+    sdata_widget = SdataWidget(viewer, EventedList([blobs_extra_cs]))
+    viewer.window.add_dock_widget(sdata_widget, name="SpatialData")
+    widget = QtAdataViewWidget(viewer)
+    sdata_widget.viewer_model.add_sdata_points(blobs_extra_cs, "many_points", "global", False)
+    layer = viewer.layers[0]
+
+    widget._select_layer()
+    assert widget.table_name_widget.currentText() == "many_points_table"
+    widget._update_adata()
+
+    # the table is joined with the subsampled points of the layer only
+    assert layer.metadata["adata"].n_obs == 400
+    assert set(layer.metadata["adata"].obs["instance_id"]) == set(layer.metadata["indices"])
+    del blobs_extra_cs.points["many_points"]
+    del blobs_extra_cs.tables["many_points_table"]
+
+
+def test_layer_update_joins_table_once(sdata_widget: SdataWidget, sdata_blobs: SpatialData):
+    widget = QtAdataViewWidget(sdata_widget.viewer_model.viewer)
+    sdata_widget.viewer_model.add_sdata_labels(sdata_blobs, "blobs_labels", "global", False)
+    # refill the widgets although they already show the layer
+    widget._shown = None
+
+    with (
+        patch("napari_spatialdata._view._join_region_table", wraps=_join_region_table) as join,
+        patch.object(widget.var_widget, "_onChange", wraps=widget.var_widget._onChange) as on_change,
+    ):
+        widget._on_layer_update()
+    # the table is joined and the widgets are refilled once, instead of again when the table names are added
+    assert join.call_count == 1
+    assert on_change.call_count == 1
+    assert widget.table_name_widget.currentText() == "table"
+    assert widget.var_widget.getAdataLayer() is None
+
+
+def test_layer_update_skipped_for_shown_layer(sdata_widget: SdataWidget, sdata_blobs: SpatialData):
+    viewer = sdata_widget.viewer_model.viewer
+    widget = QtAdataViewWidget(viewer)
+    sdata_widget.viewer_model.add_sdata_labels(sdata_blobs, "blobs_labels", "global", False)
+    sdata_widget.viewer_model.add_sdata_image(sdata_blobs, "blobs_image", "global", False)
+    viewer.layers.selection.active = viewer.layers["blobs_labels"]
+
+    with patch.object(widget.var_widget, "_onChange", wraps=widget.var_widget._onChange) as on_change:
+        # the active layer and its table did not change, e.g. when another widget sharing the model selects the layer
+        widget._select_layer()
+        assert on_change.call_count == 0
+
+        viewer.layers.selection.active = viewer.layers["blobs_image"]
+        viewer.layers.selection.active = viewer.layers["blobs_labels"]
+    assert on_change.call_count > 0
+    assert widget.table_name_widget.currentText() == "table"
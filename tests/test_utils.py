@@ -1,20 +1,35 @@
 import logging
 from typing import Any
 
+import dask.dataframe as dd
 import numpy as np
+import pandas as pd
 import pytest
+import shapely
 from anndata import AnnData
+from geopandas import GeoDataFrame
+from napari.utils.events import EventedList
+from qtpy.QtWidgets import QListWidgetItem
+from shapely import Polygon
+from spatialdata import get_element_instances, join_spatialelement_table
 from spatialdata.datasets import blobs
 
 from napari_spatialdata.utils._utils import (
     _adjust_channels_order,
     _get_categorical,
+    _get_ellipses_from_circles,
+    _get_init_metadata_adata,
+    _get_region_positions,
     _get_transform,
+    _join_region_table,
     _min_max_norm,
     _points_inside_triangles,
     _position_cluster_labels,
     _set_palette,
+    _subsample_points,
+    get_elements_meta_mapping,
 )
+from napari_spatialdata.utils._viewer_utils import _get_polygons_properties
 
 
 def test_get_categorical(adata_labels: AnnData):
@@ -76,6 +91,18 @@ def test_points_inside_triangles(adata_shapes: AnnData, tri_coord: list[list[int
     assert out.any()
 
 
+def test_points_inside_triangles_matches_shapely():
+    rng = np.random.default_rng(0)
+    points = rng.uniform(0, 100, size=(1000, 2))
+    triangles = rng.uniform(0, 100, size=(5, 3, 2))
+
+    expected = np.zeros(len(points), dtype=bool)
+    for triangle in triangles:
+        expected |= shapely.contains_xy(Polygon(triangle), points[:, 0], points[:, 1])
+
+    np.testing.assert_array_equal(_points_inside_triangles(points, triangles), expected)
+
+
 @pytest.mark.parametrize("vec", [np.array([0, 0, 2]), np.array([1, 1, 0])])
 def test_min_max_norm(vec: np.ndarray) -> None:
     out = _min_max_norm(vec)
@@ -103,6 +130,54 @@ def test_get_transform():
     assert (_get_transform(sdata.images["blobs_image"]) == np.identity(3)).all()
 
 
+def test_get_init_metadata_adata(sdata_blobs):
+    table = sdata_blobs["table"]
+    np.testing.assert_array_equal(_get_region_positions(table, "blobs_labels"), np.arange(table.n_obs))
+    assert len(_get_region_positions(table, "blobs_points")) == 0
+
+    _, expected = join_spatialelement_table(
+        sdata=sdata_blobs, spatial_element_names="blobs_labels", table_name="table", how="left", match_rows="left"
+    )
+    adata = _get_init_metadata_adata(sdata_blobs, "table", "blobs_labels")
+    pd.testing.assert_frame_equal(adata.obs, expected.obs)
+
+    # writing the region column in place is reflected in the rows of the next join
+    region = table.obs["region"].cat.add_categories(["other"])
+    region.iloc[:5] = "other"
+    table.obs["region"] = region
+    assert _get_init_metadata_adata(sdata_blobs, "table", "blobs_labels").n_obs == table.n_obs - 5
+
+
+def test_get_elements_meta_mapping_from_list_item(qtbot, sdata_blobs):
+    sdatas = EventedList([sdata_blobs])
+    expected, _ = get_elements_meta_mapping(sdatas, "global", [])
+    elements, _ = get_elements_meta_mapping(sdatas, QListWidgetItem("global"), [])
+    assert elements == expected
+    assert set(elements) == {name for _, name, _ in sdata_blobs._gen_elements()}
+
+
+def test_join_region_table(sdata_blobs):
+    _, expected = join_spatialelement_table(
+        sdata=sdata_blobs, spatial_element_names="blobs_labels", table_name="table", how="left"
+    )
+    adata = _join_region_table(sdata_blobs, "table", "blobs_labels", how="left")
+    pd.testing.assert_frame_equal(adata.obs, expected.obs)
+    np.testing.assert_array_equal(adata.X.toarray(), expected.X.toarray())
+
+
+@pytest.mark.parametrize("match_rows", ["no", "left"])
+def test_join_region_table_with_labels_instances(sdata_blobs, match_rows: str):
+    _, expected = join_spatialelement_table(
+        sdata=sdata_blobs, spatial_element_names="blobs_labels", table_name="table", how="left", match_rows=match_rows
+    )
+    instances = get_element_instances(sdata_blobs["blobs_labels"])
+    adata = _join_region_table(
+        sdata_blobs, "table", "blobs_labels", how="left", match_rows=match_rows, instances=instances
+    )
+    pd.testing.assert_frame_equal(adata.obs, expected.obs)
+    np.testing.assert_array_equal(adata.X.toarray(), expected.X.toarray())
+
+
 @pytest.mark.parametrize(
     ("c_coords", "expected_rgb"),
     [
@@ -131,3 +206,49 @@ def test_transform_to_rgb(c_coords, expected_rgb):
         assert rgb_multiscales
         assert raster.shape[2] in (3, 4)
         assert all(raster_scale.shape[2] in (3, 4) for raster_scale in raster_multiscales)
+
+
+@pytest.mark.parametrize("simplify", [False, True])
+def test_get_polygons_properties(simplify: bool):
+    df = GeoDataFrame(
+        geometry=[Polygon([(0, 0), (10, 0), (10, 20)]), Polygon([(1, 2), (3, 2), (3, 5), (1, 5)])], index=[3, 7]
+    )
+    polygons, indices = _get_polygons_properties(df, simplify)
+
+    assert indices == [3, 7]
+    assert all(polygon.dtype == np.float32 for polygon in polygons)
+    for polygon, geometry in zip(polygons, df.geometry, strict=True):
+        exterior = geometry.exterior.simplify(tolerance=2) if simplify else geometry.exterior
+        np.testing.assert_array_equal(polygon, np.asarray(exterior.coords)[:, ::-1])
+
+
+def test_get_polygons_properties_same_number_of_vertices():
+    df = GeoDataFrame(geometry=[Polygon([(0, 0), (10, 0), (10, 20)]), Polygon([(1, 2), (3, 2), (3, 5)])])
+    polygons, indices = _get_polygons_properties(df, simplify=False)
+
+    assert indices == [0, 1]
+    assert isinstance(polygons, np.ndarray)
+    assert polygons.shape == (2, 4, 2)
+    np.testing.assert_array_equal(polygons[1], np.asarray(df.geometry.iloc[1].exterior.coords)[:, ::-1])
+
+
+@pytest.mark.parametrize("size", [5, 200])
+def test_subsample_points(size: int):
+    df = pd.DataFrame({"x": np.arange(100.0), "y": np.arange(100.0), "gene": list("ab") * 50}, index=np.arange(100) * 3)
+    points = dd.from_pandas(df, npartitions=7)
+
+    subsample, n_points = _subsample_points(points, size=size)
+
+    assert n_points == 100
+    assert len(subsample) == min(size, n_points)
+    assert subsample.index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(subsample, points.compute().loc[subsample.index])
+
+
+def test_get_ellipses_from_circles():
+    yx = np.array([[10.0, 20.0], [0.0, 5.0]])
+    ellipses = _get_ellipses_from_circles(yx=yx, radii=np.array([2.0, 1.0]))
+
+    assert ellipses.shape == (2, 4, 2)
+    assert ellipses.dtype == np.float32
+    np.testing.assert_array_equal(ellipses[0], [[8, 18], [12, 18], [12, 22], [8, 22]])
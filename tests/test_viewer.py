@@ -1,31 +1,36 @@
 import re
 from pathlib import Path
+from types import SimpleNamespace
 
+import dask.dataframe as dd
 import numpy as np
+import pandas as pd
 import pytest
+from napari.layers import Points, Shapes
 from napari.utils.events import EventedList
 from qtpy.QtCore import Qt
+from shapely import Polygon
+from spatialdata import SpatialData
 from spatialdata.datasets import blobs
 from spatialdata.models import Image2DModel
 from spatialdata.transformations import Scale, Translation, set_transformation
 
 from napari_spatialdata import QtAdataViewWidget
 from napari_spatialdata._sdata_widgets import SdataWidget
+from napari_spatialdata._viewer import _N_CACHED_POINTS, SpatialDataViewer
 from napari_spatialdata.utils._test_utils import click_list_widget_item, get_center_pos_listitem
 from napari_spatialdata.utils._utils import _get_transform
 
-sdata = blobs(extra_coord_system="space")
 
-
-def test_metadata_inheritance(qtbot, make_napari_viewer: any):
+def test_metadata_inheritance(qtbot, make_napari_viewer: any, sdata_blobs: SpatialData):
     viewer = make_napari_viewer()
-    widget = SdataWidget(viewer, EventedList([sdata]))
+    widget = SdataWidget(viewer, EventedList([sdata_blobs]))
     # Click on `global` coordinate system
     center_pos = get_center_pos_listitem(widget.coordinate_system_widget, "global")
     click_list_widget_item(qtbot, widget.coordinate_system_widget, center_pos, "currentItemChanged")
 
-    widget._onClick(list(sdata.images.keys())[0])
-    widget._onClick(list(sdata.images.keys())[1])
+    widget._onClick(list(sdata_blobs.images.keys())[0])
+    widget._onClick(list(sdata_blobs.images.keys())[1])
     widget.viewer_model.viewer.add_shapes()
 
     # Two layers have the same spatialdata object. So we should count 1 spatialdata object.
@@ -43,16 +48,16 @@ def test_metadata_inheritance(qtbot, make_napari_viewer: any):
 
 
 @pytest.mark.skip(reason="Currently the events.blocker does not work when testing like this.")
-def test_layer_names_duplicates(qtbot, make_napari_viewer: any):
+def test_layer_names_duplicates(qtbot, make_napari_viewer: any, sdata_blobs: SpatialData):
     viewer = make_napari_viewer()
-    widget = SdataWidget(viewer, EventedList([sdata]))
+    widget = SdataWidget(viewer, EventedList([sdata_blobs]))
 
     # Click on `global` coordinate system
     center_pos = get_center_pos_listitem(widget.coordinate_system_widget, "global")
     click_list_widget_item(qtbot, widget.coordinate_system_widget, center_pos, "currentItemChanged")
 
-    image_name = list(sdata.images.keys())[0]
-    label_name = list(sdata.labels.keys())[0]
+    image_name = list(sdata_blobs.images.keys())[0]
+    label_name = list(sdata_blobs.labels.keys())[0]
     widget._add_image(image_name)
     widget._add_label(label_name)
 
@@ -62,24 +67,26 @@ def test_layer_names_duplicates(qtbot, make_napari_viewer: any):
     assert widget.viewer_model.viewer.layers[1].name == label_name
 
 
-def test_layer_transform(qtbot, make_napari_viewer: any):
-    blobs_image = Image2DModel.parse(sdata["blobs_image"], c_coords=("r", "g", "b"))
-    sdata["blobs_image"] = blobs_image
+def test_layer_transform(qtbot, make_napari_viewer: any, sdata_blobs: SpatialData):
+    blobs_image = Image2DModel.parse(sdata_blobs["blobs_image"], c_coords=("r", "g", "b"))
+    sdata_blobs["blobs_image"] = blobs_image
     set_transformation(
-        sdata["blobs_image"], transformation=Translation([25, 50], axes=("y", "x")), to_coordinate_system="translate"
+        sdata_blobs["blobs_image"],
+        transformation=Translation([25, 50], axes=("y", "x")),
+        to_coordinate_system="translate",
     )
     viewer = make_napari_viewer()
-    widget = SdataWidget(viewer, EventedList([sdata]))
+    widget = SdataWidget(viewer, EventedList([sdata_blobs]))
 
     # Click on `global` coordinate system
     center_pos = get_center_pos_listitem(widget.coordinate_system_widget, "global")
     click_list_widget_item(qtbot, widget.coordinate_system_widget, center_pos, "currentItemChanged")
 
-    widget._onClick(list(sdata.images.keys())[0])
+    widget._onClick(list(sdata_blobs.images.keys())[0])
     viewer.add_image(viewer.layers[0].data)
 
     no_transform = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1]])
-    affine_transform = _get_transform(sdata[list(sdata.images.keys())[0]], "translate")
+    affine_transform = _get_transform(sdata_blobs[list(sdata_blobs.images.keys())[0]], "translate")
     assert np.array_equal(viewer.layers[0].affine.affine_matrix, no_transform)
     assert np.array_equal(viewer.layers[1].affine.affine_matrix, no_transform)
 
@@ -89,12 +96,17 @@ def test_layer_transform(qtbot, make_napari_viewer: any):
 
     assert np.array_equal(viewer.layers[0].affine.affine_matrix, affine_transform)
     assert np.array_equal(viewer.layers[1].affine.affine_matrix, no_transform)
+
+    # the affine is not set again if it does not change
+    with viewer.layers[0].events.affine.blocker() as blocker:
+        widget.viewer_model._affine_transform_layers("translate")
+    assert blocker.count == 0
     viewer.close()
 
 
-def test_adata_metadata(qtbot, make_napari_viewer: any):
+def test_adata_metadata(qtbot, make_napari_viewer: any, sdata_blobs: SpatialData):
     viewer = make_napari_viewer()
-    widget = SdataWidget(viewer, EventedList([sdata]))
+    widget = SdataWidget(viewer, EventedList([sdata_blobs]))
     viewer.window.add_dock_widget(widget, name="SpatialData")
     view_widget = QtAdataViewWidget(viewer)
 
@@ -213,14 +225,14 @@ def test_save_layer_no_sdata(qtbot, make_napari_viewer: any):
         widget.viewer_model._save_to_sdata(viewer)
 
 
-def test_save_layer_multiple_selection(qtbot, tmp_path: str, make_napari_viewer: any):
+def test_save_layer_multiple_selection(qtbot, tmp_path: str, make_napari_viewer: any, sdata_blobs: SpatialData):
     tmpdir = Path(tmp_path) / "tmp.zarr"
     tmpdir2 = Path(tmp_path) / "tmp2.zarr"
     sdata2 = blobs()
-    sdata.write(tmpdir)
+    sdata_blobs.write(tmpdir)
     sdata2.write(tmpdir2)
     viewer = make_napari_viewer()
-    widget = SdataWidget(viewer, EventedList([sdata, sdata2]))
+    widget = SdataWidget(viewer, EventedList([sdata_blobs, sdata2]))
 
     # Click on `global` coordinate system
     center_pos = get_center_pos_listitem(widget.coordinate_system_widget, "global")
@@ -259,4 +271,66 @@ def test_save_layer_multiple_selection(qtbot, tmp_path: str, make_napari_viewer:
     # let's actually try the shortcut
     qtbot.keyPress(viewer.window._qt_viewer, Qt.Key_E, Qt.ShiftModifier)
     assert "Shapes" not in sdata2.shapes
-    assert "Shapes" in sdata.shapes
+    assert "Shapes" in sdata_blobs.shapes
+
+
+def test_multipolygons_keep_largest_polygon(qtbot, make_napari_viewer: any, sdata_blobs: SpatialData):
+    viewer = make_napari_viewer()
+    widget = SdataWidget(viewer, EventedList([sdata_blobs]))
+
+    layer = widget.viewer_model.get_sdata_shapes(sdata_blobs, "blobs_multipolygons", "global", False)
+    multipolygons = sdata_blobs.shapes["blobs_multipolygons"].sort_index()
+
+    assert layer.metadata["indices"] == multipolygons.index.tolist()
+    largest_areas = [max(part.area for part in getattr(geom, "geoms", [geom])) for geom in multipolygons.geometry]
+    np.testing.assert_allclose([Polygon(polygon).area for polygon in layer.data], largest_areas, rtol=1e-5)
+
+
+def test_update_cache_indices_on_remove(qtbot, make_napari_viewer: any, sdata_blobs: SpatialData):
+    viewer = make_napari_viewer()
+    widget = SdataWidget(viewer, EventedList([sdata_blobs]))
+    widget.viewer_model.add_sdata_circles(sdata_blobs, "blobs_circles", "global", False)
+    layer = viewer.layers["blobs_circles"]
+    indices = list(layer.metadata["indices"])
+
+    event = SimpleNamespace(value=None, source=layer, action="remove", data_indices=(1, 3))
+    widget.viewer_model._update_cache_indices(event)
+
+    assert layer.metadata["indices"] == [index for i, index in enumerate(indices) if i not in {1, 3}]
+    assert event.indices == (indices[3], indices[1])
+    assert widget.viewer_model._layer_event_caches["blobs_circles"] == [event]
+
+
+def test_subsample_points_cache_is_bounded(make_napari_viewer: any):
+    viewer_model = SpatialDataViewer(make_napari_viewer(), EventedList([]))
+    df = pd.DataFrame({"x": np.arange(10.0), "y": np.arange(10.0)})
+    points = [dd.from_pandas(df, npartitions=2) for _ in range(_N_CACHED_POINTS + 1)]
+
+    subsample, _ = viewer_model._get_subsample_points(points[0], size=5)
+    # the same element is not computed again and keeps its subsample
+    assert viewer_model._get_subsample_points(points[0], size=5)[0] is subsample
+    assert viewer_model._get_subsample_points(points[0], size=8)[0] is not subsample
+
+    for element in points[1:]:
+        viewer_model._get_subsample_points(element, size=5)
+    # only the last computed points elements are kept
+    assert len(viewer_model._points_cache) == _N_CACHED_POINTS
+    assert id(points[0]) not in viewer_model._points_cache
+
+
+def test_save_layers_in_world_coordinates(monkeypatch, make_napari_viewer: any, sdata_blobs: SpatialData):
+    viewer_model = SpatialDataViewer(make_napari_viewer(), EventedList([sdata_blobs]))
+    monkeypatch.setattr(viewer_model, "_write_element_to_disk", lambda *args: None)
+    metadata = {"sdata": sdata_blobs, "_current_cs": "global"}
+    transform = {"scale": (2, 3), "translate": (4, -1), "rotate": 30, "affine": np.diag([1.5, 0.5, 1])}
+
+    points = Points([[1, 2], [3, 4], [5, 6]], metadata=metadata, **transform)
+    parsed, _ = viewer_model._save_points_to_sdata(points, "saved_points", False)
+    expected = np.array([points.data_to_world(point) for point in points.data])[:, ::-1]
+    np.testing.assert_allclose(parsed.compute()[["x", "y"]].to_numpy(), expected)
+
+    square = np.array([[0, 0], [0, 10], [10, 10], [10, 0]])
+    shapes = Shapes([square], metadata=metadata, **transform)
+    parsed, _ = viewer_model._save_shapes_to_sdata(shapes, "saved_shapes", False)
+    expected = np.array([shapes.data_to_world(vertex) for vertex in square])[:, ::-1]
+    np.testing.assert_allclose(np.asarray(parsed.geometry.iloc[0].exterior.coords)[:-1], expected)
@@ -1,20 +1,31 @@
 from typing import Any
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import numpy as np
 import pandas as pd
 import pytest
 from anndata import AnnData
 from anndata.tests.helpers import assert_equal
+from geopandas import GeoDataFrame
+from napari._qt.utils import QImg2array
 from napari.layers import Image, Labels
 from napari.utils.events import EventedList
 from qtpy import QtWidgets
+from scipy.sparse import csr_matrix
+from shapely import Polygon
 from spatialdata import SpatialData
 from spatialdata._types import ArrayLike
+from spatialdata.models import ShapesModel, TableModel
 
 from napari_spatialdata._model import DataModel
+from napari_spatialdata._scatterwidgets import ScatterListWidget
 from napari_spatialdata._sdata_widgets import SdataWidget
-from napari_spatialdata._view import QtAdataScatterWidget, QtAdataViewWidget
+from napari_spatialdata._view import (
+    QtAdataAnnotationWidget,
+    QtAdataScatterWidget,
+    QtAdataViewWidget,
+    _set_items,
+)
 
 
 # make_napari_viewer is a pytest fixture that returns a napari viewer object
@@ -84,6 +95,128 @@ def test_model(
     viewer.layers.selection.events.changed.disconnect()
 
 
+def test_model_get_var(sdata_blobs: SpatialData) -> None:
+    table = sdata_blobs["table"]
+    table.layers["double"] = table.X * 2
+    model = DataModel()
+    model.adata = table
+    name = table.var_names[1]
+
+    values, _, index = model.get_var(name)
+    np.testing.assert_array_equal(values, table[:, name].X.toarray().squeeze())
+    np.testing.assert_array_equal(index, table.obs["instance_id"])
+
+    # changing the layer or the anndata object invalidates the cached matrix and var names
+    model.adata_layer = "double"
+    np.testing.assert_array_equal(model.get_var(name)[0], 2 * values)
+    renamed = table.copy()
+    renamed.var_names = pd.Index([i + "_second" for i in table.var_names])
+    model.adata = renamed
+    with pytest.raises(KeyError, match="not found in `adata.var_names`"):
+        model.get_var(name)
+    np.testing.assert_array_equal(model.get_var(name + "_second")[0], 2 * values)
+
+
+def test_model_get_obsm(adata_labels: AnnData) -> None:
+    dense = adata_labels.obsm["spatial"]
+    adata_labels.obsm["sparse"] = csr_matrix(dense)
+    model = DataModel()
+    model.adata = adata_labels
+
+    values, name, index = model.get_obsm("sparse", index=1)
+    np.testing.assert_array_equal(values, dense[:, 1])
+    np.testing.assert_array_equal(values, model.get_obsm("spatial", index=1)[0])
+    np.testing.assert_array_equal(index, adata_labels.obs["cell_id"])
+    assert name == "sparse:1:None"
+
+
+def test_model_format_key(make_napari_viewer: Any, labels: ArrayLike) -> None:
+    viewer = make_napari_viewer()
+    model = DataModel()
+    assert model._format_key("gene") == "gene:X"
+    assert model._format_key("gene", adata_layer=True) == "gene:X:None"
+
+    model.layer = viewer.add_labels(labels, name="labels")
+    model.adata_layer = "counts"
+    assert model._format_key("gene", adata_layer=True) == "gene:counts:labels"
+    assert model._format_key("spatial", index=1) == "spatial:1:labels"
+    # the formatted keys follow a renamed layer
+    model.layer.name = "renamed"
+    assert model._format_key("gene") == "gene:renamed"
+
+
+def test_model_get_adata_layers(adata_labels: AnnData) -> None:
+    model = DataModel()
+    model.adata = adata_labels
+    assert model.get_adata_layers() == tuple(adata_labels.layers.keys())
+
+    # the layer names are retrieved again for a new anndata object
+    adata = adata_labels.copy()
+    adata.layers["new"] = adata.X
+    model.adata = adata
+    assert model.get_adata_layers() == tuple(adata.layers.keys())
+    assert "new" in model.get_adata_layers()
+
+
+def test_scatterlistwidget_categorical(qtbot: Any, adata_labels: AnnData) -> None:
+    rng = np.random.default_rng(0)
+    values = rng.choice(["b", "c", "a"], size=adata_labels.n_obs)
+    adata_labels.obs["letters"] = pd.Categorical(values, categories=["c", "unused", "b", "a"])
+    model = DataModel()
+    model.adata = adata_labels
+    widget = ScatterListWidget(model, attr="obs", color=True)
+    qtbot.addWidget(widget)
+    widget.setAttribute("obs")
+
+    widget._onAction(items=["letters"])
+    assert widget.data["labels"] == ["a", "b", "c"]
+    np.testing.assert_array_equal(widget.data["vec"], np.searchsorted(["a", "b", "c"], values))
+
+
+def test_scatterlistwidget_click_reuses_data(qtbot: Any, adata_labels: AnnData) -> None:
+    model = DataModel()
+    model.adata = adata_labels
+    widget = ScatterListWidget(model, attr="obs", color=True)
+    qtbot.addWidget(widget)
+    widget._getter = MagicMock(wraps=widget._getter)
+
+    widget._onOneClick(("categorical",))
+    data = widget.data
+    widget._onOneClick(("categorical",))
+    assert widget.data is data
+    assert widget._getter.call_count == 1
+
+    # any change of the list resets the data, so the vector is retrieved again
+    widget._onChange()
+    widget._onOneClick(("categorical",))
+    assert widget.data is not data
+    assert widget._getter.call_count == 2
+
+
+def test_model_batch_update(sdata_blobs: SpatialData) -> None:
+    model = DataModel()
+    on_adata = MagicMock()
+    on_color_by = MagicMock()
+    on_layer = MagicMock()
+    model.events.adata.connect(on_adata)
+    model.events.color_by.connect(on_color_by)
+    model.events.layer.connect(on_layer)
+
+    with model.batch_update():
+        model.adata = sdata_blobs["table"]
+        model.adata = sdata_blobs["table"]
+        model.color_by = "instance_id"
+        on_adata.assert_not_called()
+        on_color_by.assert_not_called()
+    assert on_adata.call_count == 1
+    assert on_color_by.call_count == 1
+    on_layer.assert_not_called()
+
+    # outside of a batch update every assignment emits its event
+    model.adata = sdata_blobs["table"]
+    assert on_adata.call_count == 2
+
+
 @pytest.mark.parametrize("widget", [QtAdataViewWidget])
 def test_change_layer(
     make_napari_viewer: Any,
@@ -117,6 +250,35 @@ def test_change_layer(
     assert widget.table_name_widget.currentText() == widget.model.layer.metadata["table_names"][0]
 
 
+def test_scatter_widget_refreshed_once_per_selection(
+    make_napari_viewer: Any, adata_labels: AnnData, image: ArrayLike
+) -> None:
+    viewer = make_napari_viewer()
+    viewer.add_labels(image, name="labels", metadata={"adata": adata_labels})
+    viewer.add_labels(image, name="labels_2", metadata={"adata": adata_labels})
+    widget = QtAdataScatterWidget(viewer, DataModel())
+
+    with patch.object(widget.x_widget.widget, "_onChange", wraps=widget.x_widget.widget._onChange) as on_change:
+        viewer.layers.selection.active = viewer.layers["labels"]
+    assert on_change.call_count == 1
+    assert widget.model.layer is viewer.layers["labels"]
+
+
+def test_set_items_refills_only_changed_items(qtbot: Any) -> None:
+    widget = QtWidgets.QComboBox()
+    widget.addItems(["table", "table_2"])
+    widget.setCurrentIndex(1)
+
+    with patch.object(widget, "clear", wraps=widget.clear) as clear:
+        _set_items(widget, ["table", "table_2"])
+    clear.assert_not_called()
+    assert widget.currentIndex() == 0
+
+    _set_items(widget, ["table_3", None])
+    assert [widget.itemText(i) for i in range(widget.count())] == ["table_3"]
+    assert widget.currentText() == "table_3"
+
+
 # TODO add back ("obs", "a", None) once adata_labels is adjusted.
 @pytest.mark.parametrize("widget", [QtAdataScatterWidget])
 @pytest.mark.parametrize("attr, item, text", [("obsm", "spatial", 1), ("var", 27, "X")])
@@ -149,6 +311,7 @@ def test_scatterlistwidget(
     assert widget.x_widget.widget.text == text
 
     widget.x_widget.widget._onAction(items=[item])
+    assert widget.x_widget.widget.data["vec"].flags["C_CONTIGUOUS"]
     if attr == "obsm":
         expected = getattr(adata_labels, attr)[item][:, text]
         actual = widget.x_widget.widget.data["vec"]
@@ -318,3 +481,141 @@ def test_old_annotation(adata_labels, annotation_values, mocker):
 
     assert np.array_equal(scatter_widget._model.adata.obs[col_name], annotation_values)
     assert scatter_widget.status_label.text() == "Status: Annotation updated."
+
+
+def test_scatter_widget_screenshot(qtbot, adata_labels):
+    scatter_widget = QtAdataScatterWidget(adata=adata_labels)
+    scatter_widget.resize(200, 150)
+
+    screenshot = scatter_widget.screenshot()
+
+    assert screenshot.dtype == np.uint8
+    assert screenshot.shape == (scatter_widget.height(), scatter_widget.width(), 4)
+    np.testing.assert_array_equal(screenshot, QImg2array(scatter_widget.grab().toImage()))
+
+
+def test_annotation_widget_connects_layer_once(sdata_widget: SdataWidget) -> None:
+    viewer = sdata_widget.viewer_model.viewer
+    widget = QtAdataAnnotationWidget(viewer)
+
+    layer = viewer.add_shapes(name="annotations")
+    viewer.layers.remove(layer)
+    assert widget._on_mouse_move not in layer.mouse_move_callbacks
+
+    viewer.add_layer(layer)
+    assert layer.mouse_move_callbacks.count(widget._on_mouse_move) == 1
+
+
+def test_annotation_widget_annotates_all_added_shapes(sdata_widget: SdataWidget) -> None:
+    viewer = sdata_widget.viewer_model.viewer
+    widget = QtAdataAnnotationWidget(viewer)
+    layer = viewer.add_shapes(name="annotations")
+    widget._current_class = "tumor"
+
+    rectangles = [np.array([[0, 0], [0, 10], [10, 10], [10, 0]]) + offset for offset in (0, 20, 40)]
+    layer.data = rectangles
+
+    assert len(layer.features) == 3
+    assert layer.features["class"].tolist() == ["tumor"] * 3
+    assert layer.features["region"].tolist() == ["annotations"] * 3
+
+
+def test_plot_button(qtbot, adata_labels, mocker):
+    scatter_widget = QtAdataScatterWidget(adata=adata_labels)
+    on_click = mocker.patch.object(scatter_widget.plot_widget, "_onClick")
+
+    scatter_widget.plot_button_widget.click()
+
+    on_click.assert_called_once_with(
+        scatter_widget.x_widget.widget.data,
+        scatter_widget.y_widget.widget.data,
+        scatter_widget.color_widget.widget.data,
+        scatter_widget.x_widget.getFormattedLabel(),
+        scatter_widget.y_widget.getFormattedLabel(),
+        scatter_widget.color_widget.getFormattedLabel(),
+    )
+
+
+def test_annotation_widget_default_features(sdata_widget: SdataWidget) -> None:
+    viewer = sdata_widget.viewer_model.viewer
+    rectangles = [np.array([[0, 0], [0, 10], [10, 10], [10, 0]]) + offset for offset in (0, 20, 40)]
+    viewer.add_shapes(rectangles, name="annotations")
+    QtAdataAnnotationWidget(viewer)
+
+    features = viewer.layers["annotations"].features
+    assert features["class"].tolist() == ["undefined"] * 3
+    assert features["class_color"].tolist() == ["#FFFFFF"] * 3
+    assert features["description"].tolist() == [""] * 3
+    assert features["region"].tolist() == ["annotations"] * 3
+    for column in ["class", "class_color", "annotator", "region"]:
+        assert isinstance(features[column].dtype, pd.CategoricalDtype)
+
+
+def test_annotation_widget_region_follows_layer_name(sdata_widget: SdataWidget) -> None:
+    viewer = sdata_widget.viewer_model.viewer
+    rectangles = [np.array([[0, 0], [0, 10], [10, 10], [10, 0]]) + offset for offset in (0, 20)]
+    layer = viewer.add_shapes(rectangles, name="annotations")
+    QtAdataAnnotationWidget(viewer)
+
+    layer.name = "renamed"
+    assert layer.features["region"].tolist() == ["renamed"] * 2
+    assert layer.features["region"].cat.categories.tolist() == ["renamed"]
+
+
+def test_annotation_widget_sets_class_description(sdata_widget: SdataWidget) -> None:
+    viewer = sdata_widget.viewer_model.viewer
+    rectangles = [np.array([[0, 0], [0, 10], [10, 10], [10, 0]]) + offset for offset in (0, 20)]
+    layer = viewer.add_shapes(rectangles, name="annotations")
+    widget = QtAdataAnnotationWidget(viewer)
+
+    layer.selected_data = {1}
+    widget.annotation_widget.description_box.setPlainText("a description")
+    widget.annotation_widget.annotators.setCurrentText("annotator_1")
+    widget._set_class_description()
+
+    features = layer.features
+    assert features["description"].tolist() == ["", "a description"]
+    assert features["annotator"].tolist() == ["", "annotator_1"]
+    assert features["class"].tolist() == ["undefined", widget._current_class]
+    assert features["class_color"].tolist() == ["#FFFFFF", widget._current_color]
+
+
+def test_annotation_widget_imports_table_information(make_napari_viewer: Any) -> None:
+    polygons = [Polygon([(0, 0), (0, 10), (10, 10), (10, 0)]), Polygon([(20, 20), (20, 30), (30, 30), (30, 20)])]
+    obs = pd.DataFrame(
+        {
+            "cell_type": pd.Categorical(["a", "b"]),
+            "region": pd.Categorical(["annotations"] * 2),
+            "instance_id": [0, 1],
+            "annotator": pd.Categorical(["annotator_1", "annotator_1"]),
+        }
+    )
+    table = TableModel.parse(AnnData(obs=obs), region="annotations", region_key="region", instance_key="instance_id")
+    table.uns["cell_type_color"] = {"a": "#FF0000", "b": "#0000FF"}
+    sdata = SpatialData(
+        shapes={"annotations": ShapesModel.parse(GeoDataFrame(geometry=polygons))},
+        tables={"annotation_table": table},
+    )
+    viewer = make_napari_viewer()
+    viewer.window.add_dock_widget(SdataWidget(viewer, EventedList([sdata])), name="SpatialData")
+    viewer.add_shapes(
+        [np.asarray(polygon.exterior.coords)[:-1, ::-1] for polygon in polygons],
+        name="annotations",
+        metadata={"sdata": sdata, "name": "annotations"},
+    )
+    widget = QtAdataAnnotationWidget(viewer)
+    widget._update_table_name_widget(sdata, "annotations", "annotation_table")
+
+    layer = viewer.layers["annotations"]
+    assert layer.features.columns.tolist() == ["class", "class_color", "description", "annotator", "region"]
+    assert layer.features["class"].tolist() == ["a", "b"]
+    assert layer.features["class_color"].tolist() == ["#FF0000", "#0000FF"]
+    np.testing.assert_array_equal(layer.face_color, [[1, 0, 0, 1], [0, 0, 1, 1]])
+    assert table.obs.columns.tolist() == ["cell_type", "region", "instance_id", "annotator"]
+    assert widget._current_annotator == "annotator_1"
+
+    annotators = widget.annotation_widget.annotators
+    with patch.object(annotators, "clear", wraps=annotators.clear) as clear:
+        widget._import_table_information()
+    clear.assert_not_called()
+    assert annotators.currentText() == "annotator_1"